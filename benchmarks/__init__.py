@@ -0,0 +1,3 @@
+# Synthetic bid data and stage-by-stage benchmarks for the tiering pipeline.
+#
+#   python -m benchmarks.run --vendors 200 --lanes 500 --output results.json
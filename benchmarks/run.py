@@ -0,0 +1,169 @@
+# Stage-by-stage benchmark of the tiering pipeline on a synthetic bid round.
+#
+# Every stage is timed on its own and its peak Python memory is traced, then
+# the numbers are written as JSON so runs of different versions can be diffed
+# with --compare.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_bid_zip
+from tiering.diagnostics import StageTimer
+from tiering.discovery import discover_files
+from tiering.engine import SHIPPER_LANE_COLUMNS, assign_tiers
+from tiering.export import format_output, write_output
+from tiering.ingest import DESIRED_SHEETS, archive_members, load_workbooks
+from tiering.transform import PREDEFINED_TRUCK_TYPES, clean_sheet, combine_bid_rows, melt_clean_sheet
+from tiering.workspace import SessionWorkspace
+
+STAGES = ["zip", "discovery", "parse", "clean", "melt", "tier", "export"]
+
+
+# ------------------------ PIPELINE ------------------------ #
+def run_stages(zip_path, shippers=DESIRED_SHEETS, workers=1, method="dense", trace_memory=True):
+    """Run every pipeline stage on `zip_path` and return the stage records."""
+    timer = StageTimer(trace_memory)
+
+    with SessionWorkspace(prefix="tiering-bench-") as workspace:
+        with timer.stage("zip") as record:
+            with open(zip_path, "rb") as upload:
+                saved, _ = workspace.save_upload(upload)
+            sources = archive_members(saved)
+            record["rows_out"] = len(sources)
+
+        with timer.stage("discovery", len(sources)) as record:
+            sheet_map, _ = discover_files(sources)
+            shipper_files = [s for s, names in sheet_map.items() if set(names) & set(shippers)]
+            record["rows_out"] = len(shipper_files)
+
+        with timer.stage("parse", len(shipper_files)) as record:
+            workbooks, _ = load_workbooks(shipper_files, shippers, workers=workers)
+            frames = [(sheet, df) for wb in workbooks.values() for sheet, df in wb.frames.items()]
+            record["rows_out"] = sum(len(df) for _, df in frames)
+
+        with timer.stage("clean", sum(len(df) for _, df in frames)) as record:
+            cleaned = [clean_sheet(df, sheet) for sheet, df in frames]
+            record["rows_out"] = sum(len(df) for df in cleaned)
+
+        with timer.stage("melt", sum(len(df) for df in cleaned)) as record:
+            rows = combine_bid_rows(melt_clean_sheet(df) for df in cleaned)
+            record["rows_out"] = len(rows)
+
+        with timer.stage("tier", len(rows)) as record:
+            tiered = assign_tiers(rows, method, SHIPPER_LANE_COLUMNS)
+            record["rows_out"] = len(tiered)
+
+        with timer.stage("export", len(tiered)) as record:
+            output_path = os.path.join(workspace.path, "tiered_vendor_data.csv")
+            write_output(format_output(tiered), output_path)
+            record["rows_out"] = len(tiered)
+            record["bytes_out"] = os.path.getsize(output_path)
+
+    return timer.stages
+
+
+# ------------------------ REPORTING ------------------------ #
+def format_bytes(n):
+    if n is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def print_report(result, baseline=None):
+    base = {s["stage"]: s for s in baseline["stages"]} if baseline else {}
+    print(f"{'stage':<10} {'seconds':>9} {'peak mem':>11} {'rows in':>10} {'rows out':>10}" + ("  vs baseline" if base else ""))
+    for s in result["stages"]:
+        line = (
+            f"{s['stage']:<10} {s['seconds']:>9.3f} {format_bytes(s['peak_bytes']):>11} "
+            f"{s['rows_in'] if s['rows_in'] is not None else '-':>10} {s['rows_out']:>10}"
+        )
+        if s["stage"] in base and base[s["stage"]]["seconds"]:
+            line += f"  {s['seconds'] / base[s['stage']]['seconds']:.2f}x time"
+        print(line)
+    print(f"{'total':<10} {sum(s['seconds'] for s in result['stages']):>9.3f}")
+
+
+# ------------------------ CLI ------------------------ #
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Time each tiering pipeline stage on a synthetic (or given) bid ZIP.",
+    )
+    parser.add_argument("--zip", help="benchmark an existing bid ZIP instead of generating one")
+    parser.add_argument("--vendors", type=int, default=50, help="vendor workbooks to generate (default: 50)")
+    parser.add_argument("--lanes", type=int, default=100, help="origin/destination pairs (default: 100)")
+    parser.add_argument("--truck-types", default=",".join(PREDEFINED_TRUCK_TYPES), help="comma-separated truck type columns")
+    parser.add_argument("--house-share", type=float, default=0.05, help="share of SJL/JHT vendors (default: 0.05)")
+    parser.add_argument("--coverage", type=float, default=0.6, help="share of lanes each vendor quotes (default: 0.6)")
+    parser.add_argument("--clean-headers", action="store_true", help="no 'Unnamed: N' / '#REF!' junk in the headers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="parser processes; memory is only traced in-process")
+    parser.add_argument("--method", choices=["dense", "first"], default="dense")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc, which slows every stage down")
+    parser.add_argument("--label", default="", help="free text stored with the results, e.g. a git revision")
+    parser.add_argument("-o", "--output", help="write the results as JSON here")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="tiering-bench-data-") as tmp:
+        if args.zip:
+            zip_path, params = args.zip, {"path": args.zip}
+        else:
+            zip_path = os.path.join(tmp, "bids.zip")
+            print(f"Generating {args.vendors} vendor workbook(s) x {args.lanes} lane(s)...", file=sys.stderr)
+            params = generate_bid_zip(
+                zip_path,
+                vendors=args.vendors,
+                lanes=args.lanes,
+                truck_types=[t.strip() for t in args.truck_types.split(",") if t.strip()],
+                house_share=args.house_share,
+                coverage=args.coverage,
+                messy=not args.clean_headers,
+                seed=args.seed,
+            )
+            params.pop("path")
+        params["zip_bytes"] = os.path.getsize(zip_path)
+
+        stages = run_stages(zip_path, workers=args.workers, method=args.method, trace_memory=not args.no_memory)
+
+    result = {
+        "label": args.label,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "params": {**params, "workers": args.workers, "method": args.method, "trace_memory": not args.no_memory},
+        "stages": stages,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# Synthetic vendor bid generator.
+#
+# Builds bid ZIPs shaped like the real vendor template: a title row, the header
+# on the second row, VENDOR / Origin City / Destination City and one price
+# column per truck type, plus the junk columns real files carry.
+
+import io
+import random
+import zipfile
+
+import pandas as pd
+
+from tiering.ingest import DESIRED_SHEETS
+from tiering.transform import PREDEFINED_TRUCK_TYPES
+
+# ------------------------ CONSTANTS ------------------------ #
+CITIES = [
+    "Jakarta", "Surabaya", "Bandung", "Medan", "Semarang", "Makassar", "Palembang",
+    "Tangerang", "Depok", "Bekasi", "Bogor", "Batam", "Pekanbaru", "Padang",
+    "Malang", "Denpasar", "Yogyakarta", "Solo", "Balikpapan", "Pontianak",
+    "Manado", "Banjarmasin", "Jambi", "Cirebon", "Serang", "Lampung",
+]
+HOUSE_VENDORS = ["PT SJL Logistics", "JHT Express"]
+
+# Truck types price relative to a CDD on the same lane
+TRUCK_PRICE_FACTOR = {
+    'VAN BOX': 0.6, 'BLINDVAN': 0.55, 'CDE': 0.8, 'CDE LONG': 0.9, 'CDD': 1.0,
+    'CDD LONG': 1.15, 'FUSO': 1.5, 'FUSO LONG': 1.7, 'TRONTON WINGBOX': 2.2,
+}
+
+
+# ------------------------ HELPERS ------------------------ #
+def make_lanes(n_lanes, rng):
+    """`n_lanes` distinct (origin, destination) pairs."""
+    cities = list(CITIES)
+    while len(cities) * (len(cities) - 1) < n_lanes:
+        cities.append(f"City {len(cities) + 1}")
+    pairs = [(o, d) for o in cities for d in cities if o != d]
+    return rng.sample(pairs, n_lanes)
+
+
+def messy_header(column, rng, messy):
+    """The header text a vendor might have typed for `column`."""
+    if not messy or column not in PREDEFINED_TRUCK_TYPES:
+        return column
+    roll = rng.random()
+    if roll < 0.1:
+        return f" {column} "  # Stray spaces
+    if roll < 0.2:
+        return f"{column}."  # Trailing dot
+    if roll < 0.25:
+        return f"#REF!{column}"  # Broken formula reference
+    return column
+
+
+def vendor_sheet(vendor, lanes, truck_types, base_prices, rng, coverage, messy):
+    """Rows and header for one vendor's shipper sheet."""
+    rows = []
+    for origin, destination in lanes:
+        if rng.random() > coverage:
+            continue
+        prices = []
+        for truck_type in truck_types:
+            if rng.random() < 0.15:
+                prices.append(None)  # Not quoted
+            else:
+                base = base_prices[(origin, destination)] * TRUCK_PRICE_FACTOR.get(truck_type, 1.0)
+                prices.append(round(base * rng.uniform(0.85, 1.25), -3))
+        rows.append([vendor, origin, destination] + prices)
+
+    header = ['VENDOR', 'Origin City', 'Destination City'] + [
+        messy_header(t, rng, messy) for t in truck_types
+    ]
+    df = pd.DataFrame(rows, columns=header)
+
+    if messy:
+        # Blank headers read back as "Unnamed: N", stale formulas as "#REF!"
+        df.insert(3, "", None)
+        df["#REF!"] = "#REF!"
+        df[" "] = None
+    return df
+
+
+def workbook_bytes(sheets):
+    """Serialize `{sheet_name: frame}` with the header on the second row."""
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            pd.DataFrame([["RATE BIDDING FORM"]]).to_excel(writer, sheet_name=name, header=False, index=False)
+            df.to_excel(writer, sheet_name=name, startrow=1, index=False)
+    return buf.getvalue()
+
+
+# ------------------------ GENERATOR ------------------------ #
+def generate_bid_zip(
+    path,
+    vendors=50,
+    lanes=100,
+    truck_types=PREDEFINED_TRUCK_TYPES,
+    shippers=DESIRED_SHEETS,
+    house_share=0.05,
+    coverage=0.6,
+    messy=True,
+    extra_sheets=("INSTRUCTIONS",),
+    seed=0,
+):
+    """Write a synthetic bid round to `path` and return a summary dict.
+
+    `house_share` is the fraction of vendors named like SJL/JHT house vendors
+    and `coverage` the fraction of lanes each vendor quotes.
+    """
+    rng = random.Random(seed)
+    truck_types = list(truck_types)
+    lane_list = make_lanes(lanes, rng)
+    base_prices = {lane: rng.randrange(2_000_000, 15_000_000, 50_000) for lane in lane_list}
+
+    n_house = round(vendors * house_share)
+    names = [f"{HOUSE_VENDORS[i % len(HOUSE_VENDORS)]} {i + 1}" for i in range(n_house)]
+    names += [f"PT Vendor {i + 1:04d}" for i in range(vendors - n_house)]
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for vendor in names:
+            sheets = {name: pd.DataFrame([["See bid rules"]]) for name in extra_sheets}
+            for shipper in shippers:
+                sheets[shipper] = vendor_sheet(vendor, lane_list, truck_types, base_prices, rng, coverage, messy)
+            archive.writestr(f"bids/{vendor}.xlsx", workbook_bytes(sheets))
+
+    return {
+        "path": path,
+        "vendors": vendors,
+        "house_vendors": n_house,
+        "lanes": lanes,
+        "truck_types": truck_types,
+        "shippers": list(shippers),
+        "coverage": coverage,
+        "messy": messy,
+        "seed": seed,
+    }
@@ -2,12 +2,25 @@
 # This model more robutst to generate tiering system for manny Shipper like OH!SOME, SPX FTL, LOTTE.
 # This model also can generate tiering system for all shipper in one click.
 
-import streamlit as st
+import os
 import zipfile
+from functools import partial
+
+import streamlit as st
 import pandas as pd
-import os
-import shutil
-import tempfile
+
+from tiering.cache import ParseCache
+from tiering.engine import SHIPPER_LANE_COLUMNS, format_tier
+from tiering.export import EXPORT_FORMATS, OUTPUT_COLUMN_NAMES, TIERED_COLUMNS, ExportCache, format_output, with_tier_labels
+from tiering.filters import ALL, PAGE_SIZES, FilterIndex
+from tiering.history import DEFAULT_HISTORY_DIR, HistoryStore
+from tiering.ingest import DESIRED_SHEETS, PARSE_WORKERS, ArchiveLimitError, archive_members, source_name
+from tiering.jobs import JOB_POLL_SECONDS, JobManager
+from tiering.lanes import DEFAULT_TOP_K, LaneIndex
+from tiering.pipeline import ALL_SHIPPERS, PipelineError, generate_tiers, load_bids
+from tiering.revisions import apply_revision
+from tiering.summary import SUMMARY_TOP_LANES, summarize
+from tiering.workspace import SessionWorkspace
 
 # ------------------------ PAGE CONFIG ------------------------ #
 st.set_page_config(page_title="Vendor Tiering System", layout="wide")
@@ -71,57 +84,110 @@ st.markdown(
 
 st.title("📦 Vendor Tiering System for JEJE")
 
+# ------------------------ PARSE CACHE ------------------------ #
+@st.cache_resource
+def get_parse_cache():
+    """Shared on-disk cache of parsed bid rows; None if it cannot be created."""
+    try:
+        return ParseCache()
+    except OSError:
+        return None
+
+
+# ------------------------ TIER HISTORY ------------------------ #
+@st.cache_resource
+def get_history_store():
+    """Append-only store of every tiering run; None if it cannot be created."""
+    try:
+        # One tier per row here, so kept apart from app.py's dense tiers
+        return HistoryStore(os.path.join(DEFAULT_HISTORY_DIR, "improved"))
+    except OSError:
+        return None
+
+
+# ------------------------ BACKGROUND JOBS ------------------------ #
+@st.cache_resource
+def get_job_manager():
+    """Worker pool shared by every session; identical submissions share one job."""
+    return JobManager()
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress(state_key, label):
+    """Progress of the job in `st.session_state[state_key]`; reruns the page once it is done."""
+    job = st.session_state[state_key]
+    if job is None:
+        return
+    if job.done():
+        st.rerun()
+    st.progress(job.progress.fraction, text=f"{label}: {job.progress.describe()} · {job.elapsed:.0f}s")
+
+
 # ------------------------ SESSION STATE INIT ------------------------ #
-for key in ["sheet_names", "sheet_name", "extract_dir", "combined_df", "tiered_df"]:
+for key in ["sheet_names", "sheet_name", "workspace", "bid_round", "tiered_df", "filter_index", "export_cache", "archive_hash", "load_job", "tier_job", "lane_index", "tier_sheet", "tier_columns", "tier_run", "revision_job", "tier_changes", "round_comparison", "tier_summary"]:
     if key not in st.session_state:
         st.session_state[key] = None
 
 # ------------------------ SIDEBAR INPUT ------------------------ #
 uploaded_zip = st.sidebar.file_uploader("📁 Upload ZIP (Vendor Rate Bids)", type="zip")
+round_date = st.sidebar.date_input("📅 Bid Round Date")
 
 if uploaded_zip and st.sidebar.button("🔍 Extract & Load Sheets"):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp:
-        tmp.write(uploaded_zip.read())
-        tmp_path = tmp.name
-
-    if os.path.exists("bid_data"):
-        try:
-            shutil.rmtree("bid_data")
-        except PermissionError:
-            st.warning("Please close any open Excel files and try again.")
-            st.stop()
-
-    os.makedirs("bid_data", exist_ok=True)
-
-    with st.spinner("Extracting ZIP..."):
-        with zipfile.ZipFile(tmp_path, 'r') as zip_ref:
-            zip_ref.extractall("bid_data")
-    st.success("✅ ZIP extracted successfully.")
-
-    st.session_state.extract_dir = "bid_data"
-
-    # Read sheet names
-    sheet_names = set()
-    excel_files = []
-    for root, _, files in os.walk("bid_data"):
-        for file in files:
-            if file.endswith(".xlsx"):
-                excel_files.append(os.path.join(root, file))
-
-    with st.spinner("Reading sheet names from Excel files..."):
-        for file_path in excel_files:
-            try:
-                with pd.ExcelFile(file_path) as xls:
-                    sheet_names.update(xls.sheet_names)
-            except Exception as e:
-                st.warning(f"Failed reading {os.path.basename(file_path)}: {e}")
-
-    st.session_state.sheet_names = sorted(list(sheet_names))
-    st.success(f"✅ Found {len(st.session_state.sheet_names)} unique sheet(s).")
+    # Each session keeps the upload in its own temp workspace; nothing is extracted
+    if st.session_state.workspace is None:
+        st.session_state.workspace = SessionWorkspace()
+
+    # The upload is copied in chunks and only the ZIP directory is read here;
+    # archives over the size, entry count or compression ratio limits are refused
+    try:
+        with st.spinner("Loading ZIP..."):
+            zip_path, archive_hash = st.session_state.workspace.save_upload(uploaded_zip)
+            excel_files = archive_members(zip_path)
+    except (ArchiveLimitError, zipfile.BadZipFile) as e:
+        st.session_state.workspace.discard(zip_path)
+        st.error(f"❌ Cannot load the ZIP: {e}")
+        st.stop()
+    st.success("✅ ZIP loaded successfully.")
+
+    # Sheet names come from workbook metadata; only shipper sheets not in the
+    # parse cache are actually read, each workbook once. This runs as a
+    # background job, so the page stays usable and reruns do not restart it
+    st.session_state.archive_hash = archive_hash
+    # Jobs are keyed by the session's workspace too: a job's sources and timer
+    # belong to the session that submitted it, so sessions never share one
+    st.session_state.load_job = get_job_manager().submit(
+        ("load", st.session_state.workspace.path, st.session_state.archive_hash),
+        load_bids,
+        excel_files,
+        workers=PARSE_WORKERS,
+        cache=get_parse_cache()
+    )
+    st.session_state.bid_round = None
+    st.session_state.sheet_names = None
+    st.session_state.tier_run = None
+    st.session_state.tier_changes = None
+
+# Attach the loaded round to the session once its job is done
+load_job = st.session_state.load_job
+if load_job is not None and load_job.done():
+    st.session_state.load_job = None
+    try:
+        bid_round = load_job.result()
+    except Exception as e:
+        st.error(f"❌ Failed reading the ZIP: {e}")
+    else:
+        for source, e in bid_round.errors:
+            st.warning(f"Failed reading {source_name(source)}: {e}")
+
+        st.session_state.bid_round = bid_round
+        st.session_state.sheet_names = bid_round.sheet_names
+        st.success(f"✅ Found {len(st.session_state.sheet_names)} unique sheet(s).")
+if st.session_state.load_job is not None:
+    show_job_progress("load_job", "📖 Reading sheets")
 
 # ------------------------ SELECT SHEET ------------------------ #
 # Filter sheet names to include only specific ones
-desired_sheets = ["OH!SOME", "SPX FTL", "LOTTE"]
+desired_sheets = DESIRED_SHEETS
 
 if st.session_state.sheet_names:  # Ensure sheet names are loaded
     filtered_sheet_names = [sheet for sheet in st.session_state.sheet_names if sheet in desired_sheets]
@@ -130,111 +196,278 @@ else:
 
 if uploaded_zip and st.session_state.sheet_names:  # Only show the select box if sheets are loaded
     if filtered_sheet_names:
-        st.session_state.sheet_name = st.sidebar.selectbox("📄 Select Sheet to Process", filtered_sheet_names)
+        # "All Shippers" tiers every shipper sheet in one pass
+        st.session_state.sheet_name = st.sidebar.selectbox("📄 Select Sheet to Process", filtered_sheet_names + [ALL_SHIPPERS])
     else:
         st.warning("No matching sheets found. Please check the uploaded files.")
         
-# Initialize all_data as an empty list
-all_data = []
 # ------------------------ GENERATE TIERING ------------------------ #
-if st.session_state.extract_dir and st.session_state.sheet_name:
+if st.session_state.bid_round and st.session_state.sheet_name:
     if st.sidebar.button("⚙️ Generate Tiering System"):
-        excel_files = []
-        for root, _, files in os.walk(st.session_state.extract_dir):
-            for file in files:
-                if file.endswith(".xlsx"):
-                    excel_files.append(os.path.join(root, file))
-
-        with st.spinner("Processing files..."):
-            for file_path in excel_files:
-                try:
-                    with pd.ExcelFile(file_path) as xls:
-                        if st.session_state.sheet_name in xls.sheet_names:
-                            df = xls.parse(st.session_state.sheet_name, header=1)
-                            df["file_name"] = os.path.basename(file_path)
-                            all_data.append(df)
-                except Exception as e:
-                    st.warning(f"Error reading {os.path.basename(file_path)}: {e}")
-
-# ...existing code...
-
-        if all_data:
-            combined_df = pd.concat(all_data, ignore_index=True)
-            st.session_state.combined_df = combined_df
-
-            df = combined_df.copy()
-
-            # Predefined truck types
-            predefined_truck_types = ['VAN BOX', 'BLINDVAN', 'CDE', 'CDE LONG', 'CDD', 'CDD LONG', 'FUSO', 'FUSO LONG', 'TRONTON WINGBOX']
-
-            # Clean column names to remove "Unnamed" and "#REF!"
-            df.columns = df.columns.str.strip()  # Remove leading/trailing spaces
-            df.columns = df.columns.str.replace(r"Unnamed: \d+", "", regex=True)  # Remove "Unnamed: X"
-            df.columns = df.columns.str.replace(r"#REF!", "", regex=True)  # Remove "#REF!"
-            df.columns = df.columns.str.replace(r"\.+$", "", regex=True)  # Remove trailing dots
-
-            # Required ID columns
-            id_columns = ['VENDOR', 'Origin City', 'Destination City']
-
-            # Dynamically detect truck type columns (intersection with predefined truck types)
-            truck_type_columns = [col for col in df.columns if col in predefined_truck_types]
-
-            if not truck_type_columns:
-                st.error("❌ No valid truck type columns found in the data. Please check the uploaded files.")
-            else:
-                # Reshape the data based on detected truck types
-                df = df.melt(
-                    id_vars=id_columns,
-                    value_vars=truck_type_columns,
-                    var_name='truck_type',
-                    value_name='price'
-                ).dropna(subset=['price'])
-
-                df = df.rename(columns={
-                    'VENDOR': 'vendor',
-                    'Origin City': 'origin_city',
-                    'Destination City': 'destination_city'
-                })
-
-                df['price'] = pd.to_numeric(df['price'], errors='coerce')
-                df = df.dropna(subset=['price']).drop_duplicates()
-
-                def assign_tiers(group):
-                    group = group.sort_values(by="price").copy()
-                    group["tier"] = ["Tier " + str(i + 1) for i in range(len(group))]
-                    return group
-
-                tiered_df = df.groupby(
-                    ['truck_type', 'origin_city', 'destination_city'],
-                    group_keys=False
-                ).apply(assign_tiers)
-
-                st.session_state.tiered_df = tiered_df[['truck_type', 'origin_city', 'destination_city', 'vendor', 'price', 'tier']]
-                st.success("✅ Tiering system generated!")
-        
-        
+        # "All Shippers" tiers every shipper sheet together, shipper being part of the lane
+        if st.session_state.sheet_name == ALL_SHIPPERS:
+            shippers = filtered_sheet_names
+        else:
+            shippers = [st.session_state.sheet_name]
+
+        # One tier per row, ranked by price within each lane;
+        # lanes untouched since the last round keep their cached tiers
+        st.session_state.tier_sheet = st.session_state.sheet_name
+        st.session_state.tier_job = get_job_manager().submit(
+            ("tier", st.session_state.workspace.path, st.session_state.archive_hash, tuple(shippers), round_date, "first"),
+            generate_tiers,
+            st.session_state.bid_round,
+            shippers,
+            method="first",
+            house_pattern=None,
+            cache=get_parse_cache(),
+            history=get_history_store(),
+            round_date=round_date
+        )
+
+# Attach the tiers to the session once their job is done
+tier_job = st.session_state.tier_job
+if tier_job is not None and tier_job.done():
+    st.session_state.tier_job = None
+    try:
+        tier_run = tier_job.result()
+    except PipelineError as e:
+        st.error(f"❌ {e}")
+    except Exception as e:
+        st.error(f"❌ Tiering failed: {e}")
+    else:
+        st.session_state.tier_run = tier_run
+        st.session_state.tier_changes = None
+
+        # Only batch runs show the shipper column. The preview works on the
+        # run's own frame and picks these columns for the rows it shows
+        output_columns = TIERED_COLUMNS[1:]
+        if st.session_state.tier_sheet == ALL_SHIPPERS:
+            output_columns = TIERED_COLUMNS
+        st.session_state.tier_columns = output_columns
+        st.session_state.tiered_df = tier_run.tiered
+        st.session_state.filter_index = None
+        st.session_state.export_cache = None
+        st.session_state.lane_index = None
+        st.success("✅ Tiering system generated!")
+        if tier_run.recomputed_lanes is not None:
+            st.info(f"♻️ Re-tiered {tier_run.recomputed_lanes} lane(s) touched by new or changed files.")
+if st.session_state.tier_job is not None:
+    show_job_progress("tier_job", "⚙️ Generating tiers")
+
+# ------------------------ APPLY REVISION ------------------------ #
+if st.session_state.tier_run is not None and st.session_state.workspace is not None:
+    revised_files = st.sidebar.file_uploader(
+        "✏️ Upload Revised Workbooks (.xlsx)", type="xlsx", accept_multiple_files=True
+    )
+    if revised_files and st.sidebar.button("🔁 Apply Revision"):
+        # A revised workbook replaces the one with the same file name (or, when
+        # no name matches, the one quoting for the same vendor); only the lanes
+        # either one quotes on are re-tiered, every other lane keeps its tiers
+        saved = [st.session_state.workspace.save_upload(file, file.name) for file in revised_files]
+        sources = [path for path, _ in saved]
+        st.session_state.revision_job = get_job_manager().submit(
+            (
+                "revision",
+                st.session_state.workspace.path,
+                st.session_state.archive_hash,
+                tuple(digest for _, digest in saved),
+            ),
+            apply_revision,
+            st.session_state.bid_round,
+            st.session_state.tier_run,
+            sources,
+            method="first",
+            house_pattern=None,
+            cache=get_parse_cache(),
+            history=get_history_store(),
+            round_date=round_date
+        )
+
+# Swap the revised round and tiers into the session once the job is done
+revision_job = st.session_state.revision_job
+if revision_job is not None and revision_job.done():
+    st.session_state.revision_job = None
+    try:
+        revision = revision_job.result()
+    except PipelineError as e:
+        st.error(f"❌ {e}")
+    except Exception as e:
+        st.error(f"❌ Applying the revision failed: {e}")
+    else:
+        for source, e in revision.errors:
+            st.warning(f"Failed reading {source_name(source)}: {e}")
+
+        st.session_state.bid_round = revision.bid_round
+        st.session_state.tier_run = revision.tier_run
+        st.session_state.tier_changes = revision.changes
+        st.session_state.tiered_df = revision.tier_run.tiered
+        st.session_state.filter_index = None
+        st.session_state.export_cache = None
+        st.session_state.lane_index = None
+        replaced = ", ".join(source_name(source) for source in revision.replaced) or "no earlier workbook"
+        st.success(f"✅ Revision applied in place of {replaced}; re-tiered {revision.recomputed_lanes} lane(s).")
+if st.session_state.revision_job is not None:
+    show_job_progress("revision_job", "🔁 Applying revision")
+
+
 # ------------------------ DATA PREVIEW & FILTER ------------------------ #
 if st.session_state.tiered_df is not None:
     st.header("📊 Tiered Vendor Data Preview")
     df = st.session_state.tiered_df
-
-    vendor_filter = st.sidebar.selectbox("🔎 Filter by Vendor", ["All"] + sorted(df["vendor"].unique()))
-    origin_filter = st.sidebar.selectbox("📍 Filter by Origin City", ["All"] + sorted(df["origin_city"].unique()))
-    destination_filter = st.sidebar.selectbox("🎯 Filter by Destination City", ["All"] + sorted(df["destination_city"].unique()))
-
-    filtered_df = df.copy()
-    if vendor_filter != "All":
-        filtered_df = filtered_df[filtered_df["vendor"] == vendor_filter]
-    if origin_filter != "All":
-        filtered_df = filtered_df[filtered_df["origin_city"] == origin_filter]
-    if destination_filter != "All":
-        filtered_df = filtered_df[filtered_df["destination_city"] == destination_filter]
-
-    st.dataframe(filtered_df)
-
+    columns = st.session_state.tier_columns
+
+    # Filter options, row positions and the summary are built once per tiering run
+    if st.session_state.filter_index is None:
+        st.session_state.tier_summary = summarize(df, [col for col in SHIPPER_LANE_COLUMNS if col in columns])
+        filter_columns = [col for col in ["shipper", "vendor", "origin_city", "destination_city"] if col in columns]
+        with_labels = partial(with_tier_labels, columns=columns)
+        st.session_state.filter_index = FilterIndex(df, filter_columns, view=with_labels)
+
+        # XLSX uses the app.py output layout, one sheet per shipper
+        sheet_name = st.session_state.tier_sheet
+        st.session_state.export_cache = ExportCache(st.session_state.filter_index, {
+            "csv": with_labels,
+            "parquet": with_labels,
+            "xlsx": lambda rows: format_output(rows, shipper=sheet_name),
+        })
+    index = st.session_state.filter_index
+
+    shipper_filter = ALL
+    if "shipper" in index.options:
+        shipper_filter = st.sidebar.selectbox("🚚 Filter by Shipper", [ALL] + index.options["shipper"])
+    vendor_filter = st.sidebar.selectbox("🔎 Filter by Vendor", [ALL] + index.options["vendor"])
+    origin_filter = st.sidebar.selectbox("📍 Filter by Origin City", [ALL] + index.options["origin_city"])
+    destination_filter = st.sidebar.selectbox("🎯 Filter by Destination City", [ALL] + index.options["destination_city"])
+
+    selection = {
+        "shipper": shipper_filter,
+        "vendor": vendor_filter,
+        "origin_city": origin_filter,
+        "destination_city": destination_filter
+    }
+    # The default view is the per-run summary; the rows view sends only the
+    # visible page to the browser, sorted and sliced on the server
+    preview = st.radio("Preview", ["📊 Summary", "📄 Rows"], horizontal=True, label_visibility="collapsed")
+    if preview == "📊 Summary":
+        summary = st.session_state.tier_summary
+        vendors = summary.vendors
+        if vendor_filter != ALL:
+            vendors = vendors[vendors["vendor"] == vendor_filter]
+        lanes = summary.lanes
+        for column, value in selection.items():
+            if value != ALL and column in lanes:
+                lanes = lanes[lanes[column] == value]
+
+        st.subheader("Vendors")
+        st.dataframe(
+            vendors.rename(columns=OUTPUT_COLUMN_NAMES),
+            hide_index=True,
+            column_config={"tier_1_share": st.column_config.NumberColumn("Tier 1 Share", format="percent")}
+        )
+        st.subheader("Price Spread per Lane")
+        st.dataframe(
+            lanes.head(SUMMARY_TOP_LANES).rename(columns=OUTPUT_COLUMN_NAMES),
+            hide_index=True,
+            column_config={"spread_pct": st.column_config.NumberColumn("Spread %", format="percent")}
+        )
+        st.caption(f"Widest relative spread first; {min(len(lanes), SUMMARY_TOP_LANES)} of {len(lanes):,} lane(s) shown.")
+    else:
+        sort_col, order_col, size_col, page_col = st.columns(4)
+        sort_by = sort_col.selectbox(
+            "↕️ Sort By",
+            [None] + columns,
+            format_func=lambda col: "Lane & Tier" if col is None else OUTPUT_COLUMN_NAMES.get(col, col)
+        )
+        descending = order_col.selectbox("Order", ["Ascending", "Descending"]) == "Descending"
+        page_size = size_col.selectbox("Rows per Page", PAGE_SIZES)
+        total = index.count(selection)
+        pages = max(1, -(-total // page_size))
+        page = page_col.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+
+        st.dataframe(index.page(selection, page - 1, page_size, sort_by, ascending=not descending))
+        st.caption(f"Page {page} of {pages} · {total:,} row(s)")
+
+    # Built only when clicked, then cached per filter selection and format
+    export_format = st.selectbox(
+        "💾 Download Format",
+        list(EXPORT_FORMATS),
+        format_func=lambda fmt: EXPORT_FORMATS[fmt].label
+    )
+    spec = EXPORT_FORMATS[export_format]
     st.download_button(
-        label="⬇️ Download Filtered CSV",
-        data=filtered_df.to_csv(index=False),
-        file_name="tiered_vendor_data.csv",
-        mime="text/csv"
+        label=f"⬇️ Download Filtered {export_format.upper()}",
+        data=st.session_state.export_cache.loader(selection, export_format),
+        file_name=f"tiered_vendor_data{spec.extension}",
+        mime=spec.mime
     )
+
+# ------------------------ TIER CHANGES ------------------------ #
+if st.session_state.tier_changes is not None:
+    # What the last revision changed on the lanes it re-tiered
+    changes = st.session_state.tier_changes
+    st.header(f"🔁 Tier Changes from Revision ({len(changes)})")
+    st.dataframe(
+        changes.assign(
+            tier_before="Tier " + changes["tier_before"].astype("string"),
+            tier_after="Tier " + changes["tier_after"].astype("string"),
+        ).rename(columns=OUTPUT_COLUMN_NAMES),
+        hide_index=True
+    )
+
+# ------------------------ LANE LOOKUP ------------------------ #
+if st.session_state.tiered_df is not None:
+    # Built once per tiering run; every lookup below is a dict hit plus a slice
+    if st.session_state.lane_index is None:
+        st.session_state.lane_index = LaneIndex(
+            st.session_state.tiered_df,
+            [col for col in SHIPPER_LANE_COLUMNS if col in st.session_state.tier_columns]
+        )
+    lanes = st.session_state.lane_index
+
+    st.header("🔎 Lane Lookup")
+    lane = []
+    for col, column in zip(st.columns(len(lanes.lane_columns)), lanes.lane_columns):
+        lane.append(col.selectbox(OUTPUT_COLUMN_NAMES[column], lanes.choices(*lane)))
+    top_k = st.number_input("🏆 Top vendors", min_value=1, value=DEFAULT_TOP_K, step=1)
+
+    if tuple(lane) in lanes:
+        quotes = pd.DataFrame(lanes.top_k(lane, int(top_k)))
+        quotes["tier"] = format_tier(quotes["tier"])
+        st.dataframe(quotes.rename(columns={**OUTPUT_COLUMN_NAMES, "position": "#"}), hide_index=True)
+
+        lane_vendors = [quote.vendor for quote in lanes.quotes(lane)]
+        vendor = st.selectbox("📌 Rank of Vendor", lane_vendors)
+        quote = lanes.rank_of(lane, vendor)
+        st.write(
+            f"**{vendor}** is #{quote.position} of {len(lane_vendors)} on this lane: "
+            f"Tier {quote.tier} at {quote.price:,}"
+        )
+
+# ------------------------ ROUND HISTORY ------------------------ #
+history = get_history_store()
+history_rounds = history.rounds() if history is not None else []
+if len(history_rounds) >= 2:
+    st.header("📈 Round History")
+    # Only the two chosen rounds are read, one shipper at a time
+    before_col, after_col = st.columns(2)
+    before_round = before_col.selectbox("Earlier Round", history_rounds, index=len(history_rounds) - 2)
+    after_round = after_col.selectbox("Later Round", history_rounds, index=len(history_rounds) - 1)
+    if st.button("📈 Compare Rounds"):
+        st.session_state.round_comparison = (before_round, after_round, history.compare(before_round, after_round))
+
+    if st.session_state.round_comparison is not None:
+        before_round, after_round, comparison = st.session_state.round_comparison
+        counts = comparison["change"].value_counts()
+        st.caption(
+            f"{before_round} → {after_round}: {counts.get('tier', 0)} tier change(s), "
+            f"{counts.get('price', 0)} price-only change(s), {counts.get('new', 0)} new and "
+            f"{counts.get('removed', 0)} removed quote(s)"
+        )
+        st.dataframe(
+            comparison.assign(
+                tier_before="Tier " + comparison["tier_before"].astype("string"),
+                tier_after="Tier " + comparison["tier_after"].astype("string"),
+            ).rename(columns=OUTPUT_COLUMN_NAMES),
+            hide_index=True
+        )
@@ -0,0 +1,140 @@
+# Vectorized tiering against the per-lane callbacks it replaced.
+#
+# The oracles below are the `groupby(...).apply(assign_tiers)` code as it used
+# to live in app.py (dense tiers, SJL/JHT in Tier 0) and improved.py (one tier
+# per row, no house tier), kept verbatim apart from the function names.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tiering.engine import LANE_COLUMNS, assign_tiers, format_tier, tier_changes
+
+SEEDS = range(5)
+
+VENDORS = ["PT SJL", "jht express", "Vendor A", "Vendor B", "Vendor C", "Vendor D", "Vendor E"]
+TRUCK_TYPES = ["CDD", "FUSO"]
+CITIES = ["Jakarta", "Surabaya", "Bandung", None]
+
+# Few distinct prices, so most lanes have ties
+PRICES = [1000, 1500, 2000, 2500]
+
+
+# ------------------------ ORACLES ------------------------ #
+def old_app_tiers(df):
+    """app.py before the tiering engine."""
+    def assign_tiers(group):
+        sjl_jht_rows = group[group["vendor"].str.contains("SJL|JHT", case=False, na=False)].copy()
+        other_rows = group[~group["vendor"].str.contains("SJL|JHT", case=False, na=False)].copy()
+        sjl_jht_rows["tier"] = "Tier 0"
+        other_rows = other_rows.sort_values(by="price").copy()
+        unique_prices = other_rows["price"].unique()
+        price_to_tier = {price: f"Tier {i + 1}" for i, price in enumerate(unique_prices)}
+        other_rows["tier"] = other_rows["price"].map(price_to_tier)
+        return pd.concat([sjl_jht_rows, other_rows], ignore_index=True)
+
+    return df.groupby(['truck_type', 'origin_city', 'destination_city'], group_keys=False).apply(assign_tiers)
+
+
+def old_improved_tiers(df):
+    """improved.py before the tiering engine."""
+    def assign_tiers(group):
+        group = group.sort_values(by="price").copy()
+        group["tier"] = ["Tier " + str(i + 1) for i in range(len(group))]
+        return group
+
+    return df.groupby(['truck_type', 'origin_city', 'destination_city'], group_keys=False).apply(assign_tiers)
+
+
+# ------------------------ HELPERS ------------------------ #
+def random_bids(seed, n_rows=400):
+    """Melted bid rows with price ties, house vendors and some missing cities; `row` identifies each row."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "row": np.arange(n_rows),
+        "vendor": rng.choice(VENDORS, n_rows),
+        "origin_city": rng.choice(CITIES, n_rows, p=[0.45, 0.3, 0.2, 0.05]),
+        "destination_city": rng.choice(CITIES, n_rows, p=[0.3, 0.45, 0.2, 0.05]),
+        "shipper": "LOTTE",
+        "truck_type": rng.choice(TRUCK_TYPES, n_rows),
+        "price": rng.choice(PRICES, n_rows),
+    })
+
+
+def labelled(tiered):
+    """Tiered rows with "Tier N" labels as plain strings, like the old callbacks produced."""
+    tiered = tiered.copy()
+    tiered["tier"] = np.asarray(format_tier(tiered["tier"]), dtype=object)
+    return tiered
+
+
+# ------------------------ EQUIVALENCE ------------------------ #
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dense_matches_app_callbacks(seed):
+    df = random_bids(seed)
+    old = old_app_tiers(df).reset_index(drop=True)
+    new = labelled(assign_tiers(df, method="dense"))
+
+    # Same rows, each with the same tier: equal prices share a tier, so the
+    # order the old sort left tied rows in cannot change any row's tier
+    assert sorted(new["row"]) == sorted(old["row"])
+    merged = old.merge(new, on="row", suffixes=("_old", "_new"))
+    assert (merged["tier_old"] == merged["tier_new"]).all()
+
+    # Same layout: lanes in sorted order, Tier 0 first, then by price
+    assert new[LANE_COLUMNS + ["tier"]].values.tolist() == old[LANE_COLUMNS + ["tier"]].values.tolist()
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+@pytest.mark.parametrize("seed", SEEDS)
+def test_first_matches_improved_callbacks_within_ties(seed):
+    df = random_bids(seed)
+    old = old_improved_tiers(df).reset_index(drop=True)
+    new = labelled(assign_tiers(df, method="first", house_pattern=None))
+    assert sorted(new["row"]) == sorted(old["row"])
+    assert new[LANE_COLUMNS + ["tier"]].values.tolist() == old[LANE_COLUMNS + ["tier"]].values.tolist()
+
+    # The old callback sorted with the default quicksort, which is not stable,
+    # so which of several equally priced rows got the lower tier was arbitrary.
+    # The engine breaks ties by input order instead. Rows can therefore only be
+    # compared up to ties: every (lane, price) group must get the same tiers.
+    def tiers_per_price(tiered):
+        return tiered.groupby(LANE_COLUMNS + ["price"])["tier"].apply(sorted)
+
+    pd.testing.assert_series_equal(tiers_per_price(new), tiers_per_price(old))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_first_breaks_ties_by_input_order(seed):
+    tiered = assign_tiers(random_bids(seed), method="first", house_pattern=None)
+    for _, group in tiered.groupby(LANE_COLUMNS + ["price"]):
+        assert group.sort_values("tier")["row"].is_monotonic_increasing
+
+
+def test_rows_with_missing_lane_key_are_dropped():
+    df = random_bids(0)
+    tiered = assign_tiers(df)
+    assert not tiered[LANE_COLUMNS].isna().any().any()
+    assert len(tiered) == len(df.dropna(subset=LANE_COLUMNS))
+
+
+def test_unknown_rank_method():
+    with pytest.raises(ValueError):
+        assign_tiers(random_bids(0), method="min")
+
+
+# ------------------------ CHANGES ------------------------ #
+def test_tier_changes():
+    before = assign_tiers(random_bids(0).drop_duplicates(["shipper"] + LANE_COLUMNS + ["vendor"]))
+    after = before.copy()
+    after.loc[after["vendor"] == "Vendor A", "price"] += 10_000  # Drops to the last tier of its lanes
+    after = assign_tiers(after[after["vendor"] != "Vendor B"].drop(columns="tier"))
+
+    changes = tier_changes(before, after)
+    assert set(changes.loc[changes["vendor"] == "Vendor B", "change"]) == {"removed"}
+    moved = changes[changes["vendor"] == "Vendor A"]
+    assert (moved["price_change"] == 10_000).all()
+    assert set(moved["change"]) <= {"tier", "price"}
+    assert not changes["vendor"].isin(["PT SJL", "jht express"]).any()  # Tier 0 whatever the prices
+    assert tier_changes(before, before).empty
@@ -0,0 +1,130 @@
+# Parquet tier history: append-only runs, newest-run reads and round comparisons.
+
+import os
+
+import pandas as pd
+import pytest
+
+import tiering.history as history
+from tiering.engine import SHIPPER_LANE_COLUMNS, assign_tiers
+from tiering.history import HistoryStore
+from tiering.transform import compact_bid_rows
+
+LANE = ("LOTTE", "CDD", "Jakarta", "Surabaya")
+
+
+# ------------------------ HELPERS ------------------------ #
+def tiered(prices, shipper="LOTTE", origin="Jakarta"):
+    """Tiered quotes on one CDD lane to Surabaya, `prices` as `{vendor: price}`."""
+    rows = compact_bid_rows(pd.DataFrame({
+        "vendor": list(prices),
+        "origin_city": origin,
+        "destination_city": "Surabaya",
+        "shipper": shipper,
+        "truck_type": "CDD",
+        "price": list(prices.values()),
+    }))
+    return assign_tiers(rows, lane_columns=SHIPPER_LANE_COLUMNS)
+
+
+def run_files(store, shipper, round_date):
+    directory = store._partition_dir(shipper, round_date)
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory))
+
+
+# ------------------------ WRITING ------------------------ #
+def test_append_never_rewrites(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    [first] = store.append(tiered({"Vendor A": 1000, "Vendor B": 1500}), "2024-05-01")
+    with open(first, "rb") as f:
+        stored = f.read()
+
+    [second] = store.append(tiered({"Vendor A": 1200}), "2024-05-01")
+    assert second != first
+    assert run_files(store, "LOTTE", "2024-05-01") == sorted([first, second])
+    with open(first, "rb") as f:
+        assert f.read() == stored
+
+
+def test_newest_run_wins(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append(tiered({"Vendor A": 1000, "Vendor B": 1500}), "2024-05-01")
+    store.append(tiered({"Vendor A": 1200}), "2024-05-01")
+
+    df = store.read(rounds=["2024-05-01"])
+    assert list(df["vendor"]) == ["Vendor A"]
+    assert list(df["price"]) == [1200]
+    assert store.rounds("LOTTE") == ["2024-05-01"]
+
+
+def test_shipper_names_are_percent_encoded(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append(tiered({"Vendor A": 1000}, shipper="OH!SOME"), "2024-05-01")
+
+    assert os.listdir(tmp_path) == ["shipper=OH%21SOME"]
+    assert store.shippers() == ["OH!SOME"]
+    df = store.read(shippers=["OH!SOME"])
+    assert list(df["shipper"]) == ["OH!SOME"]
+    assert list(df["round"]) == ["2024-05-01"]
+
+
+# ------------------------ QUERIES ------------------------ #
+def test_compare(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append(tiered({"Vendor A": 1000, "Vendor B": 1500, "Vendor C": 2000}), "2024-05-01")
+    store.append(tiered({"Vendor A": 1600, "Vendor B": 1500, "Vendor D": 900}), "2024-06-01")
+
+    changes = store.compare("2024-05-01", "2024-06-01")
+    # Vendor B keeps its price and its tier
+    assert dict(zip(changes["vendor"], changes["change"])) == {"Vendor A": "tier", "Vendor C": "removed", "Vendor D": "new"}
+    assert changes.loc[changes["vendor"] == "Vendor A", "price_change"].tolist() == [600]
+
+
+def test_compare_with_a_missing_round(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append(tiered({"Vendor A": 1000}), "2024-05-01")
+    store.append(tiered({"Vendor B": 1000}, shipper="SPX FTL"), "2024-06-01")
+
+    changes = store.compare("2024-05-01", "2024-06-01")
+    assert dict(zip(changes["shipper"], changes["change"])) == {"LOTTE": "removed", "SPX FTL": "new"}
+    assert store.compare("2023-01-01", "2023-02-01").empty
+
+
+def test_compare_reads_only_the_two_rounds(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    for round_date in ("2024-04-01", "2024-05-01", "2024-06-01", "2024-07-01"):
+        store.append(tiered({"Vendor A": 1000}), round_date)
+        store.append(tiered({"Vendor A": 1000}, shipper="SPX FTL"), round_date)
+
+    opened = []
+    dataset = history.ds.dataset
+
+    def recording_dataset(files, **kwargs):
+        opened.extend(files)
+        return dataset(files, **kwargs)
+
+    monkeypatch.setattr(history.ds, "dataset", recording_dataset)
+    store.compare("2024-05-01", "2024-06-01", shippers=["LOTTE"])
+    expected = run_files(store, "LOTTE", "2024-05-01") + run_files(store, "LOTTE", "2024-06-01")
+    assert sorted(opened) == sorted(expected)
+
+
+def test_lane_history(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    other_lane = tiered({"Vendor A": 500}, origin="Bandung")
+    store.append(pd.concat([tiered({"Vendor A": 1000, "Vendor B": 1500}), other_lane]), "2024-05-01")
+    # The later round spells the city differently
+    store.append(pd.concat([tiered({"Vendor A": 1600, "Vendor B": 1500}, origin="JAKARTA"), other_lane]), "2024-06-01")
+
+    df = store.lane_history(("LOTTE", "CDD", "jakarta", "SURABAYA"))
+    assert list(df.columns) == ["round", "vendor", "price", "tier"]
+    assert df[["round", "vendor", "tier"]].values.tolist() == [
+        ["2024-05-01", "Vendor A", 1],
+        ["2024-05-01", "Vendor B", 2],
+        ["2024-06-01", "Vendor B", 1],
+        ["2024-06-01", "Vendor A", 2],
+    ]
+    assert list(store.lane_history(LANE, vendor="vendor b")["price"]) == [1500, 1500]
+
+    with pytest.raises(ValueError):
+        store.lane_history(LANE[:2])
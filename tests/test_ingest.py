@@ -0,0 +1,124 @@
+# Bid ZIP limits and member discovery.
+#
+# Limits are checked from the central directory of the bid ZIP, and of each
+# .xlsx inside it, before anything is decompressed.
+
+import zipfile
+
+import pandas as pd
+import pytest
+
+from tiering.ingest import (
+    ArchiveLimitError,
+    ArchiveLimits,
+    ArchiveMember,
+    archive_members,
+    check_archive_limits,
+    check_workbook_limits,
+    read_workbook,
+)
+
+LIMITS = ArchiveLimits(max_total_bytes=1024 * 1024, max_members=10, max_ratio=50)
+
+
+# ------------------------ HELPERS ------------------------ #
+def write_zip(path, members):
+    """A ZIP with `{name: bytes}` members, deflated."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return str(path)
+
+
+def infos(path):
+    with zipfile.ZipFile(path) as archive:
+        return archive.infolist()
+
+
+def workbook_bytes(tmp_path, n_rows=5):
+    path = tmp_path / "book.xlsx"
+    pd.DataFrame({"VENDOR": ["Vendor A"] * n_rows, "CDD": range(n_rows)}).to_excel(path, sheet_name="LOTTE", index=False)
+    return path.read_bytes()
+
+
+# ------------------------ OUTER ZIP ------------------------ #
+def test_archive_within_limits(tmp_path):
+    path = write_zip(tmp_path / "bids.zip", {"a.xlsx": b"x" * 100, "b.xlsx": b"y" * 100})
+    check_archive_limits(infos(path), LIMITS)
+
+
+def test_archive_with_too_many_members(tmp_path):
+    # Every entry counts, workbook or not
+    path = write_zip(tmp_path / "bids.zip", {f"notes/{i}.txt": b"" for i in range(LIMITS.max_members + 1)})
+    with pytest.raises(ArchiveLimitError, match="entries"):
+        check_archive_limits(infos(path), LIMITS)
+
+
+def test_archive_too_large_once_expanded(tmp_path):
+    limits = ArchiveLimits(max_total_bytes=1000, max_members=10, max_ratio=1e9)
+    path = write_zip(tmp_path / "bids.zip", {"a.xlsx": b"x" * 600, "b.xlsx": b"x" * 600})
+    with pytest.raises(ArchiveLimitError, match="MB"):
+        check_archive_limits(infos(path), limits)
+
+
+def test_archive_compressed_too_far(tmp_path):
+    path = write_zip(tmp_path / "bids.zip", {"bomb.xlsx": b"\0" * 100_000})
+    with pytest.raises(ArchiveLimitError, match="bomb.xlsx"):
+        check_archive_limits(infos(path), LIMITS)
+
+
+def test_size_limits_skip_other_members(tmp_path):
+    # Only workbooks that will be read count towards size and ratio
+    path = write_zip(tmp_path / "bids.zip", {"a.xlsx": b"x" * 100, "readme.txt": b"\0" * 100_000})
+    check_archive_limits(infos(path), LIMITS)
+
+
+# ------------------------ INNER WORKBOOK ------------------------ #
+def test_workbook_with_too_many_parts(tmp_path):
+    path = write_zip(tmp_path / "book.xlsx", {f"xl/part{i}.xml": b"" for i in range(LIMITS.max_members + 1)})
+    with pytest.raises(ArchiveLimitError, match="book.xlsx has"):
+        check_workbook_limits(infos(path), LIMITS, "book.xlsx")
+
+
+def test_workbook_too_large_once_expanded(tmp_path):
+    limits = ArchiveLimits(max_total_bytes=1000, max_members=10, max_ratio=1e9)
+    path = write_zip(tmp_path / "book.xlsx", {"xl/sheet1.xml": b"x" * 2000})
+    with pytest.raises(ArchiveLimitError, match="expands"):
+        check_workbook_limits(infos(path), limits)
+
+
+def test_workbook_compressed_too_far(tmp_path):
+    path = write_zip(tmp_path / "book.xlsx", {"xl/sheet1.xml": b"\0" * 100_000})
+    with pytest.raises(ArchiveLimitError, match="sheet1.xml"):
+        check_workbook_limits(infos(path), LIMITS)
+
+
+def test_read_workbook_checks_a_member(tmp_path):
+    path = write_zip(tmp_path / "bids.zip", {"Vendor A.xlsx": workbook_bytes(tmp_path)})
+    member = ArchiveMember(path, "Vendor A.xlsx")
+    assert list(read_workbook(member, limits=LIMITS).frames) == ["LOTTE"]
+
+    tight = ArchiveLimits(max_total_bytes=1024 * 1024, max_members=2, max_ratio=50)
+    with pytest.raises(ArchiveLimitError, match="Vendor A.xlsx"):
+        read_workbook(member, limits=tight)
+
+
+# ------------------------ MEMBERS ------------------------ #
+def test_archive_members(tmp_path):
+    path = write_zip(tmp_path / "bids.zip", {
+        "round/b.xlsx": b"",
+        "round/a.xlsx": b"",
+        "round/notes.txt": b"",
+        "round/~$a.xls": b"",
+        "__MACOSX/round/._a.xlsx": b"",
+    })
+    members = archive_members(path, LIMITS)
+    assert [member.name for member in members] == ["round/a.xlsx", "round/b.xlsx"]
+    assert [member.file_name for member in members] == ["a.xlsx", "b.xlsx"]
+
+
+def test_archive_members_checks_limits(tmp_path):
+    path = write_zip(tmp_path / "bids.zip", {"bomb.xlsx": b"\0" * 100_000})
+    with pytest.raises(ArchiveLimitError):
+        archive_members(path, LIMITS)
+    assert len(archive_members(path, None)) == 1
@@ -0,0 +1,114 @@
+# Vendor and city name canonicalization.
+#
+# Spellings of one name must share an ID and a lane, and be shown as the data
+# spells them, the same way whichever order the rows come in.
+
+import numpy as np
+import pandas as pd
+
+from tiering.engine import LANE_COLUMNS, assign_tiers, retier_lanes, tier_changes
+from tiering.lanes import LaneIndex
+from tiering.names import CITY_NAMES, VENDOR_NAMES, NameIndex, canonical_names, fold_name
+from tiering.transform import combine_bid_rows, compact_bid_rows
+
+
+# ------------------------ HELPERS ------------------------ #
+def bids(vendors, origins, prices, destination="Surabaya", truck_type="CDD"):
+    return compact_bid_rows(pd.DataFrame({
+        "vendor": vendors,
+        "origin_city": origins,
+        "destination_city": destination,
+        "shipper": "LOTTE",
+        "truck_type": truck_type,
+        "price": prices,
+    }))
+
+
+# ------------------------ FOLDING ------------------------ #
+def test_fold_name():
+    assert fold_name("  JAKARTA  Utara ") == fold_name("jakarta utara") == "jakarta utara"
+    assert fold_name("   ") == ""
+
+
+def test_spellings_share_an_id():
+    index = NameIndex()
+    assert index.intern("JAKARTA") == index.intern("Jakarta ") == index.intern("jakarta")
+    assert index.intern("Jakarta") != index.intern("Bandung")
+    assert index.intern(None) == index.intern(np.nan) == index.intern("  ") == -1
+
+
+def test_aliases():
+    index = NameIndex({"DKI Jakarta": "Jakarta", "Jogja": "Yogyakarta"})
+    assert index.intern("dki  jakarta") == index.intern("JAKARTA")
+    assert index.intern("Jogja") == index.intern("Yogyakarta")
+
+    # An alias target is shown as written, whatever the rows use most
+    values = pd.Series(["DKI JAKARTA", "DKI JAKARTA", "jakarta"])
+    assert list(index.canonicalize(values)) == ["Jakarta"] * 3
+
+
+# ------------------------ LABELS ------------------------ #
+def test_names_keep_their_spelling():
+    vendors = pd.Series(["PT SJL Logistics", "Vendor A"])
+    cities = pd.Series(["BSD", "Kab. Bandung"])
+    assert list(VENDOR_NAMES.canonicalize(vendors)) == list(vendors)
+    assert list(CITY_NAMES.canonicalize(cities)) == list(cities)
+
+
+def test_most_used_spelling_wins():
+    values = pd.Series(["MEDAN", "Medan ", "Medan", "Bandung"])
+    assert list(CITY_NAMES.canonicalize(values)) == ["Medan"] * 3 + ["Bandung"]
+
+    # A tie goes to the first spelling in sort order, whatever the row order
+    for values in (["medan", "MEDAN"], ["MEDAN", "medan"]):
+        assert list(CITY_NAMES.canonicalize(pd.Series(values))) == ["MEDAN"] * 2
+
+
+def test_canonicalize_categorical_with_missing_values():
+    values = pd.Series(["medan", None, "MEDAN", "  ", "Medan", np.nan, "medan"], dtype="category")
+    result = CITY_NAMES.canonicalize(values)
+    assert isinstance(result.dtype, pd.CategoricalDtype)
+    assert list(result.cat.categories) == ["medan"]
+    assert list(result.isna()) == [False, True, False, True, False, True, False]
+
+    # Already canonical columns come back as they are
+    canonical = canonical_names(pd.DataFrame({"origin_city": result}))["origin_city"]
+    assert canonical.equals(result)
+
+
+# ------------------------ LANES ------------------------ #
+def test_spellings_are_one_lane():
+    rows = combine_bid_rows([
+        bids(["Vendor A"], ["JAKARTA"], [1500]),
+        bids(["Vendor B", "Vendor C"], ["Jakarta ", "jakarta"], [1000, 2000]),
+    ])
+    tiered = assign_tiers(rows)
+    assert tiered.groupby(LANE_COLUMNS, observed=True).ngroups == 1
+    assert list(tiered["vendor"]) == ["Vendor B", "Vendor A", "Vendor C"]
+    assert list(tiered["tier"]) == [1, 2, 3]
+
+    lanes = LaneIndex(tiered)
+    assert lanes.choices("LOTTE", "CDD") == list(tiered["origin_city"].unique())
+    assert lanes.rank_of(("LOTTE", "CDD", "DKI Jakarta", "surabaya"), "VENDOR A").position == 2
+
+
+def test_spelling_change_between_runs():
+    # The previous run showed "MEDAN"; the current rows spell it "Medan"
+    previous = assign_tiers(combine_bid_rows([
+        bids(["Vendor A", "Vendor B"], ["MEDAN", "MEDAN"], [1000, 2000]),
+        bids(["Vendor C"], ["MEDAN"], [1500], destination="Bandung"),
+    ]))
+    rows = combine_bid_rows([
+        bids(["Vendor A", "Vendor B"], ["Medan", "Medan"], [1000, 2000]),
+        bids(["Vendor C", "Vendor D"], ["Medan", "Medan"], [1500, 1200], destination="Bandung"),
+    ])
+    expected = assign_tiers(rows)
+
+    # Only the Bandung lane changed, named in yet another spelling
+    lanes = bids(["Vendor D"], ["medan"], [1200], destination="BANDUNG")[LANE_COLUMNS]
+    retiered = retier_lanes(previous, rows, lanes)
+    pd.testing.assert_frame_equal(retiered.astype(object), expected.astype(object))
+
+    changes = tier_changes(previous, expected)
+    assert dict(zip(changes["vendor"], changes["change"])) == {"Vendor C": "tier", "Vendor D": "new"}
+    assert set(changes["origin_city"]) == {"Medan"}
@@ -0,0 +1,34 @@
+# Finding the workbooks of a bid round on disk.
+
+import zipfile
+
+import pytest
+
+from tiering.pipeline import PipelineError, collect_sources
+
+
+def test_collect_sources(tmp_path):
+    (tmp_path / "round" / "north").mkdir(parents=True)
+    for name in ("north/b.xlsx", "a.xlsx", "notes.txt"):
+        (tmp_path / "round" / name).write_bytes(b"")
+    assert collect_sources(str(tmp_path / "round")) == [
+        str(tmp_path / "round" / "a.xlsx"),
+        str(tmp_path / "round" / "north" / "b.xlsx"),
+    ]
+    assert collect_sources(str(tmp_path / "round" / "a.xlsx")) == [str(tmp_path / "round" / "a.xlsx")]
+
+    with zipfile.ZipFile(tmp_path / "bids.zip", "w") as archive:
+        archive.writestr("round/a.xlsx", b"")
+    assert [member.name for member in collect_sources(str(tmp_path / "bids.zip"))] == ["round/a.xlsx"]
+
+
+def test_collect_sources_of_a_missing_path(tmp_path):
+    for name in ("missing.zip", "missing.xlsx", "missing"):
+        with pytest.raises(PipelineError, match="does not exist"):
+            collect_sources(str(tmp_path / name))
+
+
+def test_collect_sources_of_another_file(tmp_path):
+    (tmp_path / "bids.csv").write_text("VENDOR,CDD\n")
+    with pytest.raises(PipelineError, match="is not a ZIP file"):
+        collect_sources(str(tmp_path / "bids.csv"))
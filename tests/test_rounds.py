@@ -0,0 +1,208 @@
+# Incremental re-tiering against tiering the whole round from scratch.
+#
+# Every shortcut (retier_lanes, the cached result of tier_round, apply_revision)
+# must give exactly what a full run on the same rows gives, row order included.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tiering.cache import ParseCache
+from tiering.engine import LANE_COLUMNS, RANK_METHODS, assign_tiers, retier_lanes, tier_changes
+from tiering.pipeline import PipelineError, generate_tiers, load_bids
+from tiering.revisions import apply_revision
+from tiering.rounds import tier_round
+from tiering.transform import CATEGORY_COLUMNS, combine_bid_rows, compact_bid_rows
+
+VENDORS = ["PT SJL", "Vendor A", "Vendor B", "Vendor C", "Vendor D"]
+TRUCK_TYPES = ["CDD", "FUSO"]
+CITIES = ["Jakarta", "Surabaya", "Bandung", "Medan"]
+PRICES = [1000, 1500, 2000, 2500]
+SHIPPERS = ["LOTTE", "SPX FTL"]
+
+
+# ------------------------ HELPERS ------------------------ #
+def vendor_rows(vendor, seed, shipper="LOTTE", n_rows=40):
+    """Bid rows one vendor workbook could hold, as tiering.transform produces them."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "vendor": vendor,
+        "origin_city": rng.choice(CITIES, n_rows),
+        "destination_city": rng.choice(CITIES, n_rows),
+        "shipper": shipper,
+        "truck_type": rng.choice(TRUCK_TYPES, n_rows),
+        "price": rng.choice(PRICES, n_rows),
+    })
+    return compact_bid_rows(df.drop_duplicates(["origin_city", "destination_city", "truck_type"]).reset_index(drop=True))
+
+
+def plain(df):
+    """Tiered rows with text columns as objects, so frames built along different paths compare equal."""
+    prices = [col for col in ("price", "price_before", "price_after", "price_change") if col in df]
+    return df.astype({col: object for col in CATEGORY_COLUMNS if col in df} | {col: "float64" for col in prices})
+
+
+def assert_same_tiers(result, expected):
+    pd.testing.assert_frame_equal(plain(result), plain(expected))
+
+
+def write_workbook(path, vendor, seed, shippers=SHIPPERS):
+    """One vendor workbook with a sheet per shipper, in the vendor template layout."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(path) as writer:
+        for i, shipper in enumerate(shippers):
+            rows = vendor_rows(vendor, seed * 10 + i, shipper)
+            sheet = rows.pivot_table(
+                index=["origin_city", "destination_city"], columns="truck_type", values="price", observed=True
+            ).reset_index()
+            sheet.insert(0, "VENDOR", vendor)
+            sheet = sheet.rename(columns={"origin_city": "Origin City", "destination_city": "Destination City"})
+            sheet.columns.name = None
+            sheet.to_excel(writer, sheet_name=shipper, index=False)
+    return str(path)
+
+
+# ------------------------ LOADING ------------------------ #
+@pytest.mark.parametrize("cached", [False, True])
+def test_same_file_name_in_two_folders(tmp_path, cached):
+    cache = ParseCache(str(tmp_path / "cache")) if cached else None
+    sources = [
+        write_workbook(tmp_path / "north" / "rates.xlsx", "Vendor A", 0),
+        write_workbook(tmp_path / "south" / "rates.xlsx", "Vendor B", 1),
+    ]
+    tier_run = generate_tiers(load_bids(sources, cache=cache), SHIPPERS, cache=cache)
+    assert set(tier_run.tiered["vendor"]) == {"Vendor A", "Vendor B"}
+
+
+# ------------------------ RETIER ------------------------ #
+@pytest.mark.parametrize("method", RANK_METHODS)
+def test_retier_lanes_matches_full_run(method):
+    frames = {vendor: vendor_rows(vendor, seed) for seed, vendor in enumerate(VENDORS)}
+    rows = combine_bid_rows(frames.values())
+    previous = assign_tiers(rows, method)
+
+    # Vendor B reprices, Vendor C drops out, a new vendor quotes
+    changed = {**frames, "Vendor B": vendor_rows("Vendor B", 99), "Vendor E": vendor_rows("Vendor E", 7)}
+    del changed["Vendor C"]
+    new_rows = combine_bid_rows(changed.values())
+    touched = [frames["Vendor B"], changed["Vendor B"], frames["Vendor C"], changed["Vendor E"]]
+    lanes = pd.concat([df[LANE_COLUMNS] for df in touched], ignore_index=True)
+
+    assert_same_tiers(retier_lanes(previous, new_rows, lanes, method), assign_tiers(new_rows, method))
+
+
+def test_retier_lanes_without_changed_lanes():
+    rows = combine_bid_rows([vendor_rows(vendor, seed) for seed, vendor in enumerate(VENDORS)])
+    previous = assign_tiers(rows)
+    assert_same_tiers(retier_lanes(previous, rows, rows[LANE_COLUMNS].iloc[:0]), previous)
+
+
+# ------------------------ CACHED RESULT ------------------------ #
+@pytest.mark.parametrize("method", RANK_METHODS)
+def test_tier_round_reuses_cached_result(tmp_path, method):
+    cache = ParseCache(str(tmp_path / "cache"))
+    rows_by_key = {}
+    for seed, vendor in enumerate(VENDORS):
+        rows_by_key[f"key-{vendor}"] = vendor_rows(vendor, seed)
+        cache.put(f"key-{vendor}", rows_by_key[f"key-{vendor}"])
+
+    tiered, recomputed = tier_round(rows_by_key, "LOTTE", method, cache=cache)
+    assert recomputed is None
+    assert_same_tiers(tiered, assign_tiers(combine_bid_rows(rows_by_key.values()), method))
+
+    # Same workbooks again: nothing to re-tier
+    tiered, recomputed = tier_round(rows_by_key, "LOTTE", method, cache=cache)
+    assert recomputed == 0
+    assert_same_tiers(tiered, assign_tiers(combine_bid_rows(rows_by_key.values()), method))
+
+    # A changed, a removed and a new workbook
+    del rows_by_key["key-Vendor B"], rows_by_key["key-Vendor C"]
+    rows_by_key["key-Vendor B-2"] = vendor_rows("Vendor B", 99)
+    rows_by_key["key-Vendor E"] = vendor_rows("Vendor E", 7)
+    tiered, recomputed = tier_round(rows_by_key, "LOTTE", method, cache=cache)
+    assert recomputed > 0
+    assert_same_tiers(tiered, assign_tiers(combine_bid_rows(rows_by_key.values()), method))
+
+
+def test_tier_round_falls_back_when_removed_rows_are_gone(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    rows_by_key = {f"key-{vendor}": vendor_rows(vendor, seed) for seed, vendor in enumerate(VENDORS)}
+    tier_round(rows_by_key, "LOTTE", cache=cache)  # Rows never put in the parse cache
+
+    del rows_by_key["key-Vendor A"]
+    tiered, recomputed = tier_round(rows_by_key, "LOTTE", cache=cache)
+    assert recomputed is None
+    assert_same_tiers(tiered, assign_tiers(combine_bid_rows(rows_by_key.values())))
+
+
+# ------------------------ REVISIONS ------------------------ #
+@pytest.mark.parametrize("method", RANK_METHODS)
+@pytest.mark.parametrize("cached", [False, True])
+def test_revision_matches_full_run(tmp_path, method, cached):
+    cache = ParseCache(str(tmp_path / "cache")) if cached else None
+    sources = [write_workbook(tmp_path / "round" / f"{vendor}.xlsx", vendor, seed) for seed, vendor in enumerate(VENDORS)]
+    revised = write_workbook(tmp_path / "revised" / "Vendor B.xlsx", "Vendor B", 99)
+
+    bid_round = load_bids(sources, cache=cache)
+    tier_run = generate_tiers(bid_round, ["LOTTE"], method, cache=cache)
+    revision = apply_revision(bid_round, tier_run, [revised], method, cache=cache)
+    assert revision.replaced == [sources[2]]
+
+    # The same round read from scratch, the revision in place of what it replaces
+    full_round = load_bids([source for source in sources if source != sources[2]] + [revised])
+    expected = generate_tiers(full_round, ["LOTTE"], method)
+    assert_same_tiers(revision.tier_run.tiered, expected.tiered)
+
+    assert not revision.changes.empty
+    key = ["shipper"] + LANE_COLUMNS + ["vendor"]
+    pd.testing.assert_frame_equal(
+        plain(revision.changes).sort_values(key).reset_index(drop=True),
+        plain(tier_changes(tier_run.tiered, expected.tiered)).sort_values(key).reset_index(drop=True),
+    )
+
+    # Shipper sheets that were not tiered come from the revision too
+    other = generate_tiers(revision.bid_round, ["SPX FTL"], method, cache=cache)
+    assert_same_tiers(other.tiered, generate_tiers(full_round, ["SPX FTL"], method).tiered)
+
+    if cached:
+        # The next Generate on the revised round starts from the revised tiers
+        again = generate_tiers(revision.bid_round, ["LOTTE"], method, cache=cache)
+        assert again.recomputed_lanes == 0
+        assert_same_tiers(again.tiered, expected.tiered)
+
+
+def test_revision_with_ambiguous_file_name(tmp_path):
+    sources = [
+        write_workbook(tmp_path / "north" / "rates.xlsx", "Vendor A", 0),
+        write_workbook(tmp_path / "south" / "rates.xlsx", "Vendor B", 1),
+    ]
+    bid_round = load_bids(sources)
+    tier_run = generate_tiers(bid_round, ["LOTTE"])
+
+    revised = write_workbook(tmp_path / "revised" / "rates.xlsx", "Vendor C", 2)
+    with pytest.raises(PipelineError):
+        apply_revision(bid_round, tier_run, [revised])
+
+
+def test_revision_of_one_of_a_vendors_workbooks(tmp_path):
+    sources = [
+        write_workbook(tmp_path / "round" / "Vendor A - Java.xlsx", "Vendor A", 0),
+        write_workbook(tmp_path / "round" / "Vendor A - Sumatra.xlsx", "Vendor A", 1),
+        write_workbook(tmp_path / "round" / "Vendor B.xlsx", "Vendor B", 2),
+    ]
+    bid_round = load_bids(sources)
+    tier_run = generate_tiers(bid_round, ["LOTTE"])
+
+    # The file name picks the workbook; the vendor's other workbook stays
+    revised = write_workbook(tmp_path / "revised" / "Vendor A - Java.xlsx", "Vendor A", 3)
+    revision = apply_revision(bid_round, tier_run, [revised])
+    assert revision.replaced == [sources[0]]
+    assert_same_tiers(revision.tier_run.tiered, generate_tiers(load_bids(sources[1:] + [revised]), ["LOTTE"]).tiered)
+
+    # Without a matching name, the vendor picks the workbook when it has only one
+    renamed = write_workbook(tmp_path / "revised" / "Vendor B (revised).xlsx", "Vendor B", 4)
+    assert apply_revision(bid_round, tier_run, [renamed]).replaced == [sources[2]]
+
+    unnamed = write_workbook(tmp_path / "revised" / "Vendor A.xlsx", "Vendor A", 5)
+    with pytest.raises(PipelineError):
+        apply_revision(bid_round, tier_run, [unnamed])
@@ -0,0 +1,82 @@
+# Header row detection and header resolution.
+#
+# Sheets are given as read with `header=None`: one list per spreadsheet row.
+
+import numpy as np
+import pandas as pd
+
+from tiering.schema import TEMPLATE_HEADER_ROW, detect_header_row, normalize_sheet
+
+HEADER = ["VENDOR", "Origin City", "Destination City", "CDD", "FUSO"]
+BODY = [
+    ["Vendor A", "Jakarta", "Surabaya", 1000, 1500],
+    ["Vendor A", "Jakarta", "Bandung", 800, np.nan],
+]
+
+
+# ------------------------ HELPERS ------------------------ #
+def sheet(*rows):
+    """A sheet as pandas reads it with `header=None`."""
+    return pd.DataFrame(list(rows))
+
+
+def expected(columns=HEADER):
+    return pd.DataFrame(BODY, columns=HEADER)[list(columns)]
+
+
+def assert_normalized(result, columns=HEADER):
+    pd.testing.assert_frame_equal(result.astype(object), expected(columns).astype(object))
+
+
+# ------------------------ DETECTION ------------------------ #
+def test_header_on_first_row():
+    assert detect_header_row(sheet(HEADER, *BODY))[0] == 0
+    assert_normalized(normalize_sheet(sheet(HEADER, *BODY)))
+
+
+def test_title_row_before_header():
+    raw = sheet(["Bid round May 2024", None, None, None, None], HEADER, *BODY)
+    row, schema = detect_header_row(raw)
+    assert row == 1
+    assert schema.columns == tuple(HEADER)
+    assert_normalized(normalize_sheet(raw))
+
+
+def test_header_further_down():
+    blank = [None] * len(HEADER)
+    raw = sheet(["Vendor bid form"] + blank[1:], blank, ["Shipper: LOTTE"] + blank[1:], HEADER, *BODY)
+    assert detect_header_row(raw)[0] == 3
+    assert_normalized(normalize_sheet(raw))
+
+
+def test_messy_headers():
+    messy = [" vendor ", "ORIGIN  CITY", "Destination City.", "#REF!CDD", "fuso.."]
+    assert_normalized(normalize_sheet(sheet(messy, *BODY)))
+
+
+def test_unknown_and_repeated_columns_are_dropped():
+    header = ["No", "VENDOR", "Origin City", "Destination City", "CDD", "Notes", "CDD"]
+    body = [[i + 1, *row[:4], "", 9999] for i, row in enumerate(BODY)]
+    assert_normalized(normalize_sheet(sheet(header, *body)), HEADER[:4])
+
+
+def test_fallback_when_no_row_looks_like_a_header():
+    # A row with a single canonical name is not enough
+    raw = sheet(["Rates", None], ["VENDOR", "Notes"], ["Vendor A", "x"], ["Vendor B", "y"])
+    row, schema = detect_header_row(raw)
+    assert row == TEMPLATE_HEADER_ROW
+    assert schema.columns == ("VENDOR",)
+    assert list(normalize_sheet(raw)["VENDOR"]) == ["Vendor A", "Vendor B"]
+
+
+def test_empty_sheet():
+    row, schema = detect_header_row(pd.DataFrame())
+    assert row == 0 and schema.columns == ()
+    assert normalize_sheet(pd.DataFrame()).empty
+
+
+# ------------------------ FIXED HEADER ------------------------ #
+def test_explicit_header_row():
+    # Read with `header=1`: the columns are already the header cells
+    df = pd.DataFrame(BODY, columns=[" VENDOR", "Origin City.", "Destination City", "Unnamed: 3", "FUSO"])
+    assert_normalized(normalize_sheet(df, header=1), ["VENDOR", "Origin City", "Destination City", "FUSO"])
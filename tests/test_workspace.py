@@ -0,0 +1,43 @@
+# Per-session upload storage.
+
+import io
+import os
+
+import pytest
+
+from tiering.workspace import COPY_CHUNK_SIZE, SessionWorkspace
+
+
+class BrokenUpload(io.BytesIO):
+    """An upload whose connection drops after the first chunk."""
+
+    def read(self, size=-1):
+        if self.tell():
+            raise ConnectionResetError("upload interrupted")
+        return super().read(size)
+
+
+def test_uploads_are_stored_by_content():
+    with SessionWorkspace() as workspace:
+        first, first_hash = workspace.save_upload(io.BytesIO(b"round one"))
+        second, second_hash = workspace.save_upload(io.BytesIO(b"round two"))
+        again, again_hash = workspace.save_upload(io.BytesIO(b"round one"))
+
+        # A later upload never rewrites the file an earlier one is read from
+        assert first != second and first_hash != second_hash
+        assert (first, first_hash) == (again, again_hash)
+        with open(first, "rb") as f:
+            assert f.read() == b"round one"
+
+
+def test_revised_workbooks_keep_their_file_name():
+    with SessionWorkspace() as workspace:
+        path, _ = workspace.save_upload(io.BytesIO(b"rates"), "Vendor A.xlsx")
+        assert path.endswith("Vendor A.xlsx")
+
+
+def test_interrupted_upload_leaves_nothing_behind():
+    with SessionWorkspace() as workspace:
+        with pytest.raises(ConnectionResetError):
+            workspace.save_upload(BrokenUpload(b"x" * (COPY_CHUNK_SIZE + 1)))
+        assert [files for _, _, files in os.walk(workspace.path) if files] == []
@@ -0,0 +1,21 @@
+# Reusable building blocks behind the Vendor Tiering System Streamlit apps.
+#
+# run_pipeline() tiers a bid ZIP or directory end to end; `python -m tiering`
+# does the same from the command line. LaneIndex answers "best vendors for this
+# lane" questions on the result, apply_revision() swaps corrected vendor
+# workbooks into a tiered round and HistoryStore compares results across rounds.
+
+from tiering.engine import (
+    HOUSE_VENDOR_PATTERN,
+    LANE_COLUMNS,
+    SHIPPER_LANE_COLUMNS,
+    assign_tiers,
+    compute_tier_numbers,
+    format_tier,
+    tier_changes,
+)
+from tiering.history import HistoryStore
+from tiering.lanes import LaneIndex, LaneQuote
+from tiering.names import CITY_NAMES, VENDOR_NAMES, NameIndex, canonical_names
+from tiering.pipeline import PipelineError, generate_tiers, load_bids, run_pipeline
+from tiering.revisions import Revision, apply_revision
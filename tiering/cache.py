@@ -0,0 +1,170 @@
+# Content-addressed cache of parsed bid rows.
+#
+# Most bid rounds re-upload the same vendor workbooks. Parsed and melted rows
+# are stored as Parquet files named after a hash of the workbook content plus
+# the sheet name, so an unchanged workbook is never parsed twice. The cache is
+# capped in size and evicts the least recently used entries first.
+#
+# The last tiered result per shipper is kept alongside, with the keys of the
+# sheets it was built from stored in the same Parquet file, so a new round only has to re-tier the lanes
+# touched by new, changed or removed workbooks.
+
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tiering.ingest import ArchiveMember
+from tiering.names import NAMES_VERSION
+
+# ------------------------ CONSTANTS ------------------------ #
+DEFAULT_CACHE_DIR = os.environ.get(
+    "TIERING_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "vendor-tiering"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("TIERING_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Bump when the bid row layout or normalization changes, to orphan old entries
+CACHE_VERSION = "4"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Parquet schema metadata entry holding the sheet keys of a tiered result
+RESULT_KEYS_METADATA = b"tiering.keys"
+
+
+# ------------------------ KEYS ------------------------ #
+def content_hash(source):
+    """SHA-256 of a workbook's bytes (path or ArchiveMember)."""
+    digest = hashlib.sha256()
+    # Archive members are hashed as they are decompressed, without a copy
+    with source.stream() if isinstance(source, ArchiveMember) else open(source, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(workbook_hash, sheet_name, header):
+    """Key of one parsed sheet; also covers the header row, cache version and name aliases."""
+    raw = f"{CACHE_VERSION}\0{NAMES_VERSION}\0{header}\0{workbook_hash}\0{sheet_name}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ------------------------ CACHE ------------------------ #
+class ParseCache:
+    """Parquet files of bid rows on local disk, with a size cap and LRU eviction.
+
+    Every read refreshes the entry's modification time, which is what eviction
+    orders by. All operations are best effort: a failing read is a miss and a
+    failing write is skipped, so the cache can never break a tiering run.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.rows_dir = os.path.join(root, "rows")
+        self.results_dir = os.path.join(root, "results")
+        os.makedirs(self.rows_dir, exist_ok=True)
+        os.makedirs(self.results_dir, exist_ok=True)
+
+    # ---- bid rows ---- #
+    def _rows_path(self, key):
+        return os.path.join(self.rows_dir, f"{key}.parquet")
+
+    def get(self, key):
+        """Cached bid rows for `key`, or None."""
+        path = self._rows_path(key)
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)  # Mark as recently used
+            return df
+        except Exception:
+            return None
+
+    def put(self, key, df):
+        """Store bid rows under `key` and evict old entries if over the cap."""
+        if _write_parquet(df, self._rows_path(key)):
+            self.evict()
+
+    def __contains__(self, key):
+        return os.path.exists(self._rows_path(key))
+
+    def size(self):
+        """Total bytes used by cached bid rows."""
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.rows_dir):
+            if entry.name.endswith(".parquet"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another session meanwhile
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits `max_bytes`."""
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, path, _ in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    # ---- last tiered result ---- #
+    def _result_path(self, name):
+        safe = hashlib.sha256(name.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.results_dir, f"{safe}.parquet")
+
+    def get_result(self, name):
+        """`(tiered_df, keys)` of the last result saved under `name`, or None."""
+        try:
+            table = pq.read_table(self._result_path(name))
+            keys = json.loads(table.schema.metadata[RESULT_KEYS_METADATA])["keys"]
+            return table.to_pandas(), keys
+        except Exception:
+            return None
+
+    def put_result(self, name, tiered_df, keys):
+        """Save a tiered result and the sheet keys it was built from.
+
+        Both go into one file written atomically, so concurrent runs can never
+        leave one run's rows next to another run's keys.
+        """
+        keys = json.dumps({"name": name, "keys": list(keys)}).encode("utf-8")
+        _write_parquet(tiered_df, self._result_path(name), {RESULT_KEYS_METADATA: keys})
+
+
+# ------------------------ HELPERS ------------------------ #
+def _write_parquet(df, path, metadata=None):
+    """Atomically write `df` as Parquet, with extra schema `metadata`; returns False if it cannot be stored."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if metadata:
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        return True
+    except Exception:
+        # e.g. mixed-type object columns Arrow cannot represent
+        os.remove(tmp_path)
+        return False
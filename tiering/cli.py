@@ -0,0 +1,75 @@
+# Command-line entry point: python -m tiering BIDS -o OUTPUT [options]
+
+import argparse
+import sys
+
+from tiering.cache import ParseCache
+from tiering.engine import HOUSE_VENDOR_PATTERN, RANK_METHODS
+from tiering.history import HistoryStore, round_label
+from tiering.ingest import DESIRED_SHEETS, PARSE_WORKERS, source_name
+from tiering.pipeline import PipelineError, run_pipeline
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m tiering",
+        description="Generate the vendor tiering system from a ZIP or directory of vendor bid workbooks.",
+    )
+    parser.add_argument("bids", help="bid ZIP file, directory of .xlsx files, or a single .xlsx")
+    parser.add_argument("-o", "--output", required=True, help="where to write the tiered vendor data (.csv, .xlsx or .parquet)")
+    parser.add_argument(
+        "-s", "--shipper",
+        action="append",
+        dest="shippers",
+        choices=DESIRED_SHEETS,
+        help="shipper sheet to tier; repeat for several (default: every shipper found)",
+    )
+    parser.add_argument("--method", choices=RANK_METHODS, default="dense", help="price ranking within a lane (default: dense)")
+    parser.add_argument("--no-house-tier", action="store_true", help=f"do not put {HOUSE_VENDOR_PATTERN} vendors in Tier 0")
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS, help=f"parser processes (default: {PARSE_WORKERS})")
+    parser.add_argument("--no-cache", action="store_true", help="parse every workbook and skip the parse cache")
+    parser.add_argument("--cache-dir", help="parse cache location (default: TIERING_CACHE_DIR or ~/.cache/vendor-tiering)")
+    parser.add_argument("--round-date", type=round_label, help="bid round date for the history, YYYY-MM-DD (default: today)")
+    parser.add_argument("--no-history", action="store_true", help="do not append the result to the tier history")
+    parser.add_argument(
+        "--history-dir",
+        help="tier history location (default: TIERING_HISTORY_DIR or ~/.local/share/vendor-tiering/history)",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    cache = None
+    if not args.no_cache:
+        cache = ParseCache(args.cache_dir) if args.cache_dir else ParseCache()
+
+    history = None
+    if not args.no_history:
+        history = HistoryStore(args.history_dir) if args.history_dir else HistoryStore()
+
+    try:
+        bid_round, tier_run, output_df = run_pipeline(
+            args.bids,
+            shippers=args.shippers,
+            output=args.output,
+            method=args.method,
+            house_pattern=None if args.no_house_tier else HOUSE_VENDOR_PATTERN,
+            workers=args.workers,
+            cache=cache,
+            history=history,
+            round_date=args.round_date,
+        )
+    except PipelineError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    for source, e in bid_round.errors:
+        print(f"warning: failed reading {source_name(source)}: {e}", file=sys.stderr)
+
+    print(
+        f"Tiered {len(output_df)} row(s) for {', '.join(tier_run.shippers)} "
+        f"from {len(bid_round.workbooks)} workbook(s) -> {args.output}"
+    )
+    return 0
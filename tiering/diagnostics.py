@@ -0,0 +1,177 @@
+# Per-stage timing and memory instrumentation.
+#
+# A StageTimer records wall time, peak traced memory and rows in/out for every
+# stage of a run, and optionally writes each record as one JSON log line so
+# runs can be compared across bid rounds. Stages can nest (a workbook read
+# inside the parse stage); each one still reports its own peak.
+#
+# tracemalloc is process-wide while jobs run on several threads, so stages
+# that trace memory take a process-wide lock and run one at a time; stages
+# that do not trace never wait for it.
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# ------------------------ CONSTANTS ------------------------ #
+# Where JSON log lines go; stderr when unset
+LOG_PATH = os.environ.get("TIERING_DIAGNOSTICS_LOG")
+
+# Files listed by slowest_files() by default
+SLOWEST_FILES = 5
+
+logger = logging.getLogger("tiering.diagnostics")
+
+# Held by the thread whose traced stages are open; re-entrant for nested stages
+_trace_lock = threading.RLock()
+
+# Per thread: peak slots of its traced stages currently open, outermost first
+_local = threading.local()
+
+
+# ------------------------ LOGGING ------------------------ #
+def json_logger():
+    """The diagnostics logger, given a message-only handler on first use."""
+    if not logger.handlers:
+        handler = logging.FileHandler(LOG_PATH, encoding="utf-8") if LOG_PATH else logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+# ------------------------ MEMORY ------------------------ #
+def _open_peaks():
+    if not hasattr(_local, "peaks"):
+        _local.peaks = []
+    return _local.peaks
+
+
+def _sync_peaks():
+    # Fold the traced peak into every open stage, then restart the peak so a
+    # nested stage measures only itself
+    peak = tracemalloc.get_traced_memory()[1]
+    for slot in _open_peaks():
+        slot[0] = max(slot[0], peak)
+    tracemalloc.reset_peak()
+
+
+# ------------------------ PROGRESS ------------------------ #
+def no_progress(stage, done=0, total=0, detail=""):
+    """Default `progress` callback: `progress(stage, done, total, detail)` reports nothing."""
+
+
+# ------------------------ TIMER ------------------------ #
+class StageTimer:
+    """Collects wall time, peak traced memory and row counts per stage.
+
+    With `trace_memory`, tracemalloc runs while any stage is open; it slows
+    Python allocations down noticeably, and traced stages of different threads
+    wait for each other. Peaks still include whatever untraced threads allocate
+    meanwhile. Work done in parse worker processes is not traced. With `log`, every record is also written as a JSON line that
+    carries `context` (e.g. the archive name) and the run id.
+    """
+
+    def __init__(self, trace_memory=True, log=False, **context):
+        self.trace_memory = trace_memory
+        self.log = log
+        self.context = context
+        self.run_id = uuid.uuid4().hex[:12]
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows_in=None, **fields):
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None, **fields}
+        peaks = _open_peaks()
+        # Nested in a traced stage of this thread: trace too, its lock is already held
+        tracing = self.trace_memory or bool(peaks)
+        started = False
+        if tracing:
+            _trace_lock.acquire()
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            _sync_peaks()
+            base = tracemalloc.get_traced_memory()[0]
+            slot = [base]
+            peaks.append(slot)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            record["peak_bytes"] = None
+            if tracing:
+                try:
+                    _sync_peaks()
+                    # By identity: two open slots can hold equal values
+                    peaks[:] = [other for other in peaks if other is not slot]
+                    record["peak_bytes"] = slot[0] - base
+                    if started:
+                        tracemalloc.stop()
+                finally:
+                    _trace_lock.release()
+            self.add(record)
+
+    def add(self, record):
+        """Keep a finished record (e.g. one sent back by a worker) and log it."""
+        self.stages.append(record)
+        if self.log:
+            line = {
+                "event": "tiering_stage",
+                "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "run": self.run_id,
+                **self.context,
+                **record,
+            }
+            json_logger().info(json.dumps(line, default=str))
+
+    def extend(self, records):
+        for record in records:
+            self.add(record)
+
+    # ------------------------ SUMMARIES ------------------------ #
+    def summary(self):
+        """One row per stage, in the order the stages last ran.
+
+        Per-file stages are summed: total seconds over all files, the largest
+        single peak and the number of files. Other stages show their latest
+        record, e.g. the last of several tier runs.
+        """
+        rows = {}
+        for record in self.stages:
+            if "file" not in record:
+                rows.pop(record["stage"], None)
+            row = rows.setdefault(record["stage"], {
+                "stage": record["stage"],
+                "seconds": 0.0,
+                "peak_bytes": None,
+                "rows_in": None,
+                "rows_out": None,
+                "files": 0,
+            })
+            row["seconds"] += record["seconds"]
+            if record.get("peak_bytes") is not None:
+                row["peak_bytes"] = max(row["peak_bytes"] or 0, record["peak_bytes"])
+            for key in ("rows_in", "rows_out"):
+                if record.get(key) is not None:
+                    row[key] = (row[key] or 0) + record[key]
+            if "file" in record:
+                row["files"] += 1
+        return list(rows.values())
+
+    def slowest_files(self, n=SLOWEST_FILES):
+        """`[(file, seconds), ...]` for the `n` files with the most per-file stage time."""
+        totals = {}
+        for record in self.stages:
+            if "file" in record:
+                totals[record["file"]] = totals.get(record["file"], 0.0) + record["seconds"]
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:n]
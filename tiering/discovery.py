@@ -0,0 +1,69 @@
+# Header-only sheet discovery.
+#
+# An .xlsx file is a ZIP archive and its sheet names live in xl/workbook.xml.
+# Reading that one small XML part is enough to know which shippers a vendor
+# workbook covers, without openpyxl loading a single cell.
+
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+from tiering.ingest import check_workbook_limits, opened_source
+
+# ------------------------ CONSTANTS ------------------------ #
+DEFAULT_WORKBOOK_PART = "xl/workbook.xml"
+OFFICE_DOCUMENT_REL = "/officeDocument"
+
+
+# ------------------------ HELPERS ------------------------ #
+def _local_name(tag):
+    """Strip the XML namespace so transitional and strict OOXML both match."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _workbook_part(xlsx):
+    """Locate the workbook part, falling back to _rels/.rels for unusual layouts."""
+    names = set(xlsx.namelist())
+    if DEFAULT_WORKBOOK_PART in names:
+        return DEFAULT_WORKBOOK_PART
+    if "_rels/.rels" in names:
+        root = ET.fromstring(xlsx.read("_rels/.rels"))
+        for rel in root:
+            if rel.get("Type", "").endswith(OFFICE_DOCUMENT_REL):
+                return posixpath.normpath(rel.get("Target", "").lstrip("/"))
+    raise KeyError("workbook part not found; not an .xlsx file?")
+
+
+# ------------------------ DISCOVERY ------------------------ #
+def workbook_sheet_names(source):
+    """Sheet names of one .xlsx, in workbook order.
+
+    `source` is a path, an ArchiveMember or a seekable binary file object. Only
+    the workbook metadata is decompressed, and only once the workbook's parts
+    pass the archive limits (ArchiveLimitError otherwise).
+    """
+    with opened_source(source) as handle, zipfile.ZipFile(handle) as xlsx:
+        check_workbook_limits(xlsx.infolist())
+        with xlsx.open(_workbook_part(xlsx)) as part:
+            return [
+                elem.get("name")
+                for _, elem in ET.iterparse(part)
+                if _local_name(elem.tag) == "sheet"
+            ]
+
+
+def discover_files(paths):
+    """Sheet names for each .xlsx path or ArchiveMember.
+
+    Returns `(sheet_map, errors)`: `{source: [sheet, ...]}` plus a list of
+    `(source, exception)` for files whose metadata could not be read.
+    """
+    sheet_map = {}
+    errors = []
+    for path in paths:
+        try:
+            sheet_map[path] = workbook_sheet_names(path)
+        except Exception as e:
+            errors.append((path, e))
+    return sheet_map, errors
+
@@ -0,0 +1,164 @@
+# Vectorized tiering engine.
+#
+# Replaces the per-lane `groupby(...).apply(assign_tiers)` callbacks that used to
+# live inside the Streamlit button handlers. Everything here runs as a handful of
+# whole-frame operations, so the cost no longer grows with the number of lanes.
+
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from tiering.names import name_ids, relabel
+
+# ------------------------ CONSTANTS ------------------------ #
+# Columns that identify one lane; tiers are ranked independently per lane
+LANE_COLUMNS = ['truck_type', 'origin_city', 'destination_city']
+
+# Lane key when several shippers are tiered together in one batch
+SHIPPER_LANE_COLUMNS = ['shipper'] + LANE_COLUMNS
+
+# House vendors always get Tier 0 and are left out of the price ranking
+HOUSE_VENDOR_PATTERN = "SJL|JHT"
+
+# Distinct (vendor, pattern) pairs whose house-vendor flag is remembered
+CACHED_HOUSE_FLAGS = 16384
+
+# Tiers are stored as small integers and only turned into "Tier N" for display
+TIER_DTYPE = "int16"
+
+# "dense" -> equal prices share a tier (app.py)
+# "first" -> every row gets its own tier, ties broken by input order (improved.py)
+RANK_METHODS = ("dense", "first")
+
+
+# ------------------------ HELPERS ------------------------ #
+@lru_cache(maxsize=CACHED_HOUSE_FLAGS)
+def is_house_vendor(vendor, pattern=HOUSE_VENDOR_PATTERN):
+    """Whether one vendor name matches the house-vendor pattern; memoized across runs."""
+    return bool(pattern) and re.search(pattern, str(vendor), flags=re.IGNORECASE) is not None
+
+
+def house_vendor_mask(vendors, pattern=HOUSE_VENDOR_PATTERN):
+    """Boolean mask of rows whose vendor matches the house-vendor pattern."""
+    if not pattern:
+        return np.zeros(len(vendors), dtype=bool)
+    if not isinstance(vendors.dtype, pd.CategoricalDtype):
+        vendors = vendors.astype("category")
+    # Flag each distinct vendor once, then broadcast through the codes
+    flags = np.fromiter((is_house_vendor(vendor, pattern) for vendor in vendors.cat.categories), dtype=bool)
+    return np.append(flags, False)[vendors.cat.codes.to_numpy()]
+
+
+def format_tier(tier_numbers):
+    """Turn integer tier numbers into categorical "Tier N" labels for display."""
+    uniques, codes = np.unique(np.asarray(tier_numbers, dtype=np.int64), return_inverse=True)
+    return pd.Categorical.from_codes(codes.reshape(-1), [f"Tier {n}" for n in uniques])
+
+
+# ------------------------ TIERING ------------------------ #
+def compute_tier_numbers(df, method="dense", lane_columns=LANE_COLUMNS, house_pattern=HOUSE_VENDOR_PATTERN):
+    """Return the integer tier of every row of `df` as a numpy array.
+
+    House vendors get 0, everyone else is ranked by price within their lane
+    starting from 1. Rows with a missing lane key get -1.
+    """
+    if method not in RANK_METHODS:
+        raise ValueError(f"Unknown rank method {method!r}, expected one of {RANK_METHODS}")
+
+    is_house = house_vendor_mask(df["vendor"], house_pattern)
+    tiers = np.zeros(len(df), dtype=np.int64)
+
+    ranked = df.loc[~is_house, lane_columns + ["price"]]
+    ranks = ranked.groupby(lane_columns, sort=False, dropna=True, observed=True)["price"].rank(method=method)
+
+    # groupby(dropna=True) leaves NaN for rows with a missing key
+    tiers[~is_house] = ranks.fillna(-1).to_numpy().astype(np.int64)
+    missing_key = df[lane_columns].isna().any(axis=1).to_numpy()
+    tiers[missing_key] = -1
+    return tiers
+
+
+def assign_tiers(df, method="dense", lane_columns=LANE_COLUMNS, house_pattern=HOUSE_VENDOR_PATTERN):
+    """Add an integer "tier" column to a melted bid frame.
+
+    `df` needs the lane columns plus "vendor" and "price". The result has the same
+    rows and ordering as the old per-group `assign_tiers` callbacks: lanes in
+    sorted order, house vendors first, then the remaining vendors by price.
+    Rows with a missing lane key are dropped, as `groupby` used to do. Use
+    format_tier for the "Tier N" labels.
+    """
+    df = df.reset_index(drop=True)
+    tier_numbers = compute_tier_numbers(df, method, lane_columns, house_pattern)
+
+    df["tier"] = tier_numbers.astype(TIER_DTYPE)
+    df = df[df["tier"] >= 0]
+
+    # Tier numbers already follow price order within a lane and a stable sort keeps
+    # the original order for ties, so one sort reproduces the old row layout
+    df = df.sort_values(lane_columns + ["tier"], kind="mergesort")
+    return df.reset_index(drop=True)
+
+
+def lane_index(df, lane_columns=LANE_COLUMNS):
+    """The lane key of every row as a MultiIndex, for fast membership tests.
+
+    City names are their name IDs (see tiering.names), so frames that spell
+    a city differently still match.
+    """
+    return pd.MultiIndex.from_frame(name_ids(df, lane_columns))
+
+
+def retier_lanes(previous, rows, lanes, method="dense", lane_columns=LANE_COLUMNS, house_pattern=HOUSE_VENDOR_PATTERN):
+    """Recompute tiers only for `lanes`, keeping every other lane of `previous`.
+
+    `previous` is an earlier assign_tiers result, `rows` the complete current
+    bid rows and `lanes` a frame of lane keys whose rows changed. The result is
+    identical to `assign_tiers(rows)` as long as lanes outside `lanes` have the
+    same rows in `previous` as in `rows`. Kept lanes take the spelling of
+    names in `rows`.
+    """
+    affected = lane_index(lanes[lane_columns].drop_duplicates(), lane_columns)
+    kept = relabel(previous[~lane_index(previous, lane_columns).isin(affected)], rows)
+    fresh = assign_tiers(rows[lane_index(rows, lane_columns).isin(affected)], method, lane_columns, house_pattern)
+
+    # Each lane comes entirely from one side, so a stable sort on the lane alone
+    # restores the full-run order without disturbing the order inside a lane
+    parts = [part for part in (kept, fresh[kept.columns]) if not part.empty]
+    if not parts:
+        return kept.reset_index(drop=True)
+    combined = pd.concat(parts, ignore_index=True)
+    return combined.sort_values(lane_columns, kind="mergesort").reset_index(drop=True)
+
+
+# ------------------------ CHANGES ------------------------ #
+def tier_changes(before, after, lane_columns=SHIPPER_LANE_COLUMNS):
+    """Vendor quotes whose tier or price differs between two tiered frames.
+
+    One row per lane and vendor with `price_before`, `price_after`,
+    `price_change`, `tier_before` and `tier_after` (missing on the side where
+    the quote does not exist) and `change`: "new", "removed", "tier" or "price".
+    Names are matched whatever their spelling and shown as in `after`.
+    """
+    keys = lane_columns + ["vendor"]
+    before = relabel(before, after)
+
+    # A vendor quoting a lane twice is compared on its best-tiered row
+    def best(df):
+        return df[keys + ["price", "tier"]].drop_duplicates(keys).astype({"tier": "Int16"})
+
+    merged = best(before).merge(best(after), on=keys, how="outer", suffixes=("_before", "_after"))
+    merged["price_change"] = merged["price_after"] - merged["price_before"]
+    change = pd.Series("tier", index=merged.index)
+    change[merged["tier_before"].eq(merged["tier_after"]).fillna(False)] = "price"
+    change[merged["tier_before"].isna()] = "new"
+    change[merged["tier_after"].isna()] = "removed"
+    merged["change"] = change
+
+    differs = (
+        merged["tier_before"].ne(merged["tier_after"]).fillna(True)
+        | merged["price_before"].ne(merged["price_after"])
+    )
+    columns = keys + ["price_before", "price_after", "price_change", "tier_before", "tier_after", "change"]
+    return merged.loc[differs, columns].reset_index(drop=True)
@@ -0,0 +1,191 @@
+# Output formatting and export.
+#
+# The tiered frame uses snake_case column names and integer tiers internally;
+# users get the column layout of the original app.py download, with "Tier N"
+# labels produced only here. Exports are written in chunks and, in the app,
+# generated only when a download is requested, then cached per filter state.
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+
+import pandas as pd
+
+from tiering.diagnostics import StageTimer
+from tiering.engine import format_tier
+from tiering.filters import selection_key
+
+# ------------------------ CONSTANTS ------------------------ #
+OUTPUT_COLUMN_NAMES = {
+    "origin_city": "Origin",
+    "destination_city": "Destination",
+    "price": "Transport Price",
+    "vendor": "Transporter",
+    "tier": "Tiering",
+    "truck_type": "Type Truck",
+    'shipper': 'Shipper'
+}
+
+OUTPUT_COLUMNS = ['Shipper', "Type Truck", "Origin", "Destination", "Transport Price", "Transporter", "Tiering", "Status"]
+
+# Columns of a tiered frame in the order the apps show them
+TIERED_COLUMNS = ['shipper', 'truck_type', 'origin_city', 'destination_city', 'vendor', 'price', 'tier']
+
+# Rows per CSV write / Parquet row group
+EXPORT_CHUNK_ROWS = 100_000
+
+# Excel's row limit, minus the header row
+XLSX_MAX_ROWS = 1_048_575
+
+# Sheet name used when an export has no shipper column
+XLSX_DEFAULT_SHEET = "Tiering"
+
+# Exported files kept per ExportCache; each can be several MB
+CACHED_EXPORTS = 4
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    label: str
+    extension: str
+    mime: str
+
+
+EXPORT_FORMATS = {
+    "csv": ExportFormat("CSV", ".csv", "text/csv"),
+    "xlsx": ExportFormat("Excel (one sheet per shipper)", ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ExportFormat("Parquet", ".parquet", "application/vnd.apache.parquet"),
+}
+
+
+# ------------------------ FORMATTING ------------------------ #
+def with_tier_labels(tiered_df, columns=None):
+    """The tiered frame with "Tier N" labels instead of tier numbers, only `columns` if given."""
+    if columns is not None:
+        tiered_df = tiered_df[columns]
+    return tiered_df.assign(tier=format_tier(tiered_df["tier"].to_numpy()))
+
+
+def format_output(tiered_df, shipper=None):
+    """Rename and reorder a tiered frame into the user-facing layout.
+
+    `shipper` fills the Shipper column for single-sheet frames without one.
+    """
+    # Reset the index to exclude the index column from the CSV
+    df = tiered_df.reset_index(drop=True)
+    if "shipper" not in df:
+        df["shipper"] = pd.Categorical([shipper] * len(df))
+
+    # Rename columns and reorder them
+    df = with_tier_labels(df).rename(columns=OUTPUT_COLUMN_NAMES)
+    df = df[OUTPUT_COLUMNS[:-1]]
+
+    # Add a "Status" column with the value "Active"
+    df["Status"] = pd.Categorical(["Active"] * len(df))
+
+    # Format the "Transport Price" column to remove ".0"
+    df["Transport Price"] = df["Transport Price"].astype(int)
+    return df
+
+
+# ------------------------ EXPORT ------------------------ #
+def write_csv(df, target):
+    """Write `df` as CSV to a path or binary file, EXPORT_CHUNK_ROWS rows at a time."""
+    df.to_csv(target, index=False, chunksize=EXPORT_CHUNK_ROWS, encoding="utf-8")
+
+
+def write_parquet(df, target):
+    """Write `df` as Parquet to a path or binary file, one row group per chunk."""
+    df.to_parquet(target, index=False, row_group_size=EXPORT_CHUNK_ROWS)
+
+
+def _sheet_name(name):
+    # Excel sheet names: at most 31 characters, none of []:*?/\
+    return re.sub(r"[\[\]:*?/\\]", "_", str(name))[:31] or XLSX_DEFAULT_SHEET
+
+
+def write_xlsx(df, target):
+    """Write `df` as an XLSX workbook with one sheet per shipper.
+
+    Shippers with more rows than an Excel sheet holds continue on numbered
+    sheets ("LOTTE (2)", ...).
+    """
+    shipper_column = next((col for col in ("Shipper", "shipper") if col in df), None)
+    if shipper_column is None or df.empty:
+        groups = [(XLSX_DEFAULT_SHEET, df)]
+    else:
+        groups = df.groupby(shipper_column, sort=False, observed=True)
+
+    with pd.ExcelWriter(target, engine="openpyxl") as writer:
+        for shipper, group in groups:
+            for part, start in enumerate(range(0, max(len(group), 1), XLSX_MAX_ROWS)):
+                name = _sheet_name(shipper)
+                if part:
+                    suffix = f" ({part + 1})"
+                    name = name[:31 - len(suffix)] + suffix
+                group.iloc[start:start + XLSX_MAX_ROWS].to_excel(writer, sheet_name=name, index=False)
+
+
+EXPORT_WRITERS = {
+    "csv": write_csv,
+    "xlsx": write_xlsx,
+    "parquet": write_parquet,
+}
+
+
+def export_format(path):
+    """Export format key for `path`, chosen by its extension (CSV by default)."""
+    extension = os.path.splitext(str(path))[1].lower()
+    for fmt, spec in EXPORT_FORMATS.items():
+        if spec.extension == extension:
+            return fmt
+    return "csv"
+
+
+def export_bytes(df, fmt="csv"):
+    """`df` exported to `fmt`, as bytes."""
+    buffer = BytesIO()
+    EXPORT_WRITERS[fmt](df, buffer)
+    return buffer.getvalue()
+
+
+def write_output(df, path, fmt=None):
+    """Write an output frame to `path`; the format follows the extension unless `fmt` is given."""
+    EXPORT_WRITERS[fmt or export_format(path)](df, path)
+    return path
+
+
+class ExportCache:
+    """Exported files for the filter selections of one FilterIndex.
+
+    `views` maps a format key to the function turning a filtered slice of the
+    indexed frame into the exported layout. Nothing is exported until
+    `data()` is called, and the last CACHED_EXPORTS results are kept. Each
+    export actually built is recorded as an "export" stage on `timer`.
+    """
+
+    def __init__(self, index, views, timer=None):
+        self.index = index
+        self.views = dict(views)
+        self.timer = timer if timer is not None else StageTimer(trace_memory=False)
+        self._export = lru_cache(maxsize=CACHED_EXPORTS)(self._compute)
+
+    def _compute(self, selection, fmt):
+        rows = self.index.rows(selection)
+        df = self.index.df if rows is None else self.index.df.iloc[rows]
+        with self.timer.stage("export", len(df), format=fmt) as record:
+            data = export_bytes(self.views[fmt](df), fmt)
+            record["rows_out"] = len(df)
+            record["bytes_out"] = len(data)
+        return data
+
+    def data(self, selection, fmt="csv"):
+        """Bytes of the `fmt` export for the `{column: value}` `selection`."""
+        return self._export(selection_key(selection), fmt)
+
+    def loader(self, selection, fmt="csv"):
+        """Zero-argument callable returning `data(selection, fmt)`, for a deferred download."""
+        key = selection_key(selection)
+        return lambda: self._export(key, fmt)
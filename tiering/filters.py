@@ -0,0 +1,148 @@
+# Indexed filtering for the Data Preview sidebar.
+#
+# The option lists and the row positions of every value are computed once per
+# tiering run. A filter combination is then answered by intersecting a few
+# sorted position arrays, and the resulting slice is cached, so moving a
+# selectbox no longer copies or scans the whole tiered frame. The preview only
+# ever asks for one page: sorting happens on row positions, and only the rows
+# of that page are sliced out and formatted.
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ------------------------ CONSTANTS ------------------------ #
+# Selectbox value meaning "do not filter on this column"
+ALL = "All"
+
+# Filtered slices kept per FilterIndex
+CACHED_SELECTIONS = 32
+
+# Rows per preview page the apps offer; the first is the default
+PAGE_SIZES = (50, 100, 500, 1000)
+
+
+# ------------------------ HELPERS ------------------------ #
+def _sorted_values(values):
+    try:
+        return sorted(values)
+    except TypeError:
+        # Mixed types (e.g. numeric vendor codes next to names)
+        return sorted(values, key=str)
+
+
+def selection_key(selection):
+    """Hashable, order-independent form of a `{column: value}` filter selection."""
+    return tuple(
+        (col, value)
+        for col, value in sorted(selection.items())
+        if value is not None and value != ALL
+    )
+
+
+# ------------------------ INDEX ------------------------ #
+class FilterIndex:
+    """Sorted filter options plus row positions per value for a frame.
+
+    `df` is kept as is and never copied; `filter()` returns cached slices of
+    it, passed through `view` (e.g. output formatting) when one is given. Rows
+    whose value is missing never match a specific filter value.
+    """
+
+    def __init__(self, df, columns, view=None):
+        self.df = df
+        self.view = view
+        self.columns = list(columns)
+        self.options = {}
+        self.positions = {}
+        for col in self.columns:
+            # groupby().indices gives value -> sorted positions in one pass
+            indices = df.groupby(col, sort=False, observed=True).indices
+            self.options[col] = _sorted_values(indices)
+            self.positions[col] = indices
+        self._select = lru_cache(maxsize=CACHED_SELECTIONS)(self._compute)
+        self._ordered = lru_cache(maxsize=CACHED_SELECTIONS)(self._ordered_rows)
+        self._orders = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def rows(self, selection):
+        """Positions matching `((column, value), ...)`, or None for every row."""
+        arrays = []
+        for col, value in selection:
+            positions = self.positions[col].get(value)
+            if positions is None:
+                return np.empty(0, dtype=np.intp)
+            arrays.append(positions)
+        if not arrays:
+            return None
+
+        # Start from the most selective column to keep intersections small
+        arrays.sort(key=len)
+        rows = arrays[0]
+        for positions in arrays[1:]:
+            rows = np.intersect1d(rows, positions, assume_unique=True)
+        return rows
+
+    def _compute(self, selection):
+        rows = self.rows(selection)
+        df = self.df if rows is None else self.df.iloc[rows].reset_index(drop=True)
+        return self.view(df) if self.view is not None else df
+
+    def filter(self, selection):
+        """Rows matching `{column: value}`; ALL or None leaves a column unfiltered.
+
+        Without a `view`, the unfiltered case returns the indexed frame itself,
+        so treat results as read-only.
+        """
+        return self._select(selection_key(selection))
+
+    # ------------------------ PAGES ------------------------ #
+    def count(self, selection):
+        """Number of rows matching `{column: value}`."""
+        rows = self.rows(selection_key(selection))
+        return len(self.df) if rows is None else len(rows)
+
+    def _order(self, column, ascending):
+        # Positions of every row sorted on one column, built once per column and direction
+        key = (column, ascending)
+        if key not in self._orders:
+            values = self.df[column].reset_index(drop=True)
+            if isinstance(values.dtype, pd.CategoricalDtype) and not values.cat.categories.is_monotonic_increasing:
+                values = values.astype(object)  # Categoricals sort by category order
+            try:
+                ordered = values.sort_values(ascending=ascending, kind="stable", na_position="last")
+            except TypeError:
+                ordered = values.sort_values(ascending=ascending, kind="stable", na_position="last", key=lambda s: s.astype(str))
+            self._orders[key] = ordered.index.to_numpy()
+        return self._orders[key]
+
+    def _ordered_rows(self, selection, sort_by, ascending):
+        rows = self.rows(selection)
+        if sort_by is None:
+            return rows
+        order = self._order(sort_by, ascending)
+        if rows is None:
+            return order
+        matches = np.zeros(len(self.df), dtype=bool)
+        matches[rows] = True
+        return order[matches[order]]
+
+    def page(self, selection, number=0, size=PAGE_SIZES[0], sort_by=None, ascending=True):
+        """Page `number` (from 0) of `size` rows matching `{column: value}`.
+
+        Rows keep the frame's order unless `sort_by` names a column. Only the
+        page's rows are sliced and passed through `view`; the result is indexed
+        by row number within the selection, starting at 1.
+        """
+        rows = self._ordered(selection_key(selection), sort_by, ascending)
+        start = max(number, 0) * size
+        if rows is None:
+            df = self.df.iloc[start:start + size]
+        else:
+            df = self.df.iloc[rows[start:start + size]]
+        df = self.view(df) if self.view is not None else df.copy()
+        df.index = pd.RangeIndex(start + 1, start + 1 + len(df))
+        return df
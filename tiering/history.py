@@ -0,0 +1,221 @@
+# Tier history across bid rounds.
+#
+# Every tiering run can be appended to a local Parquet store laid out as
+# shipper=<name>/round=<YYYY-MM-DD>/<run>.parquet. Files are only ever added:
+# saving the same shipper and round again writes a newer run that supersedes
+# the older one on reads. Queries go through a pyarrow dataset over the newest
+# run of each partition and read only the partitions and columns they need, so
+# comparing two rounds never loads the rest of the history. Rounds may spell a
+# city or vendor differently, so names are matched on their name IDs after the
+# scan rather than in a pushed-down filter.
+
+import os
+import tempfile
+import time
+import uuid
+from datetime import date, datetime
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from tiering.engine import SHIPPER_LANE_COLUMNS, TIER_DTYPE, tier_changes
+from tiering.names import canonical_key, name_ids, name_index
+
+# ------------------------ CONSTANTS ------------------------ #
+DEFAULT_HISTORY_DIR = os.environ.get(
+    "TIERING_HISTORY_DIR",
+    os.path.join(os.path.expanduser("~"), ".local", "share", "vendor-tiering", "history"),
+)
+
+# Rows per Parquet row group; row group statistics let lane queries skip the rest
+HISTORY_ROW_GROUP_ROWS = 50_000
+
+# Columns stored per row; shipper and round live in the partition path
+HISTORY_SCHEMA = pa.schema([
+    ("truck_type", pa.string()),
+    ("origin_city", pa.string()),
+    ("destination_city", pa.string()),
+    ("vendor", pa.string()),
+    ("price", pa.float64()),
+    ("tier", pa.int16()),
+])
+
+PARTITION_SCHEMA = pa.schema([("shipper", pa.string()), ("round", pa.string())])
+
+
+# ------------------------ HELPERS ------------------------ #
+def round_label(round_date=None):
+    """ISO date ("2024-05-31") of a round given as a date, datetime or string; today by default."""
+    if round_date is None:
+        round_date = date.today()
+    if isinstance(round_date, datetime):
+        round_date = round_date.date()
+    if isinstance(round_date, str):
+        round_date = date.fromisoformat(round_date)
+    return round_date.isoformat()
+
+
+def _partition_value(text):
+    return quote(str(text), safe="")
+
+
+def _history_table(rows):
+    columns = {}
+    for field in HISTORY_SCHEMA:
+        values = rows[field.name]
+        if field.type == pa.string():
+            values = values.astype(object)  # Categoricals are stored as plain strings
+        columns[field.name] = pa.array(values, type=field.type, from_pandas=True)
+    return pa.Table.from_pydict(columns, schema=HISTORY_SCHEMA)
+
+
+# ------------------------ STORE ------------------------ #
+class HistoryStore:
+    """Append-only Parquet history of tiered results, partitioned by shipper and round date."""
+
+    def __init__(self, root=DEFAULT_HISTORY_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _partition_dir(self, shipper, round_date):
+        return os.path.join(self.root, f"shipper={_partition_value(shipper)}", f"round={_partition_value(round_date)}")
+
+    # ---- writing ---- #
+    def append(self, tiered_df, round_date=None):
+        """Store one tiered result (with a `shipper` column) as round `round_date`.
+
+        Writes one new file per shipper and never touches existing ones.
+        Returns the paths written.
+        """
+        label = round_label(round_date)
+        # Sortable by time, so the newest run of a partition is the largest name
+        run = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        paths = []
+        for shipper, rows in tiered_df.groupby("shipper", sort=False, observed=True):
+            directory = self._partition_dir(shipper, label)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{run}.parquet")
+
+            # Written under a temp name and renamed, so readers never see a partial run
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            os.close(fd)
+            try:
+                pq.write_table(_history_table(rows), tmp_path, row_group_size=HISTORY_ROW_GROUP_ROWS)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            paths.append(path)
+        return paths
+
+    # ---- listing ---- #
+    def _partitions(self):
+        """`{(shipper, round): newest run file}` from the directory tree alone."""
+        partitions = {}
+        for shipper_entry in os.scandir(self.root):
+            if not (shipper_entry.is_dir() and shipper_entry.name.startswith("shipper=")):
+                continue
+            shipper = unquote(shipper_entry.name[len("shipper="):])
+            for round_entry in os.scandir(shipper_entry.path):
+                if not (round_entry.is_dir() and round_entry.name.startswith("round=")):
+                    continue
+                runs = [entry.name for entry in os.scandir(round_entry.path) if entry.name.endswith(".parquet")]
+                if runs:
+                    round_date = unquote(round_entry.name[len("round="):])
+                    partitions[(shipper, round_date)] = os.path.join(round_entry.path, max(runs))
+        return partitions
+
+    def shippers(self):
+        return sorted({shipper for shipper, _ in self._partitions()})
+
+    def rounds(self, shipper=None):
+        """Sorted round dates stored, for one shipper or any."""
+        return sorted({r for s, r in self._partitions() if shipper is None or s == shipper})
+
+    def dataset(self, shippers=None, rounds=None):
+        """pyarrow dataset over the newest run of the matching partitions.
+
+        It carries `shipper` and `round` columns from the paths; nothing is
+        read until it is scanned.
+        """
+        files = [
+            path for (shipper, round_date), path in sorted(self._partitions().items())
+            if (shippers is None or shipper in shippers) and (rounds is None or round_date in rounds)
+        ]
+        return ds.dataset(
+            files,
+            schema=pa.unify_schemas([HISTORY_SCHEMA, PARTITION_SCHEMA]),
+            format="parquet",
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+            partition_base_dir=self.root,
+        )
+
+    # ---- queries ---- #
+    def read(self, shippers=None, rounds=None, columns=None, lane=None, vendor=None):
+        """Stored rows as a DataFrame, filtered on partitions, a lane prefix and vendor.
+
+        `lane` is a `(shipper, truck_type, origin_city, destination_city)`
+        tuple or a prefix of one. Shipper and truck type filters are pushed
+        down to the scan; city and vendor names may use any spelling, as in
+        the bid rows.
+        """
+        lane_columns = SHIPPER_LANE_COLUMNS[:len(lane or ())]
+        key = dict(zip(lane_columns, canonical_key(lane_columns, lane or ())))
+        if vendor is not None:
+            key.update(zip(["vendor"], canonical_key(["vendor"], [vendor])))
+
+        expression = None
+        for column, value in key.items():
+            if name_index(column) is None:
+                expression = _and(expression, ds.field(column) == value)
+        names = [column for column in key if name_index(column) is not None]
+        read_columns = None if columns is None else list(dict.fromkeys(columns + names))
+        df = self.dataset(shippers, rounds).to_table(columns=read_columns, filter=expression).to_pandas()
+
+        if names:
+            ids = name_ids(df, names)
+            matches = np.logical_and.reduce([ids[column].to_numpy() == key[column] for column in names])
+            df = df.loc[matches, columns if columns is not None else df.columns].reset_index(drop=True)
+        if "tier" in df:
+            df["tier"] = df["tier"].astype(TIER_DTYPE)
+        return df
+
+    def compare(self, before, after, shippers=None, lane=None, vendor=None):
+        """Tier and price changes per lane and vendor from round `before` to round `after`.
+
+        Shippers are compared one at a time, reading only their two rounds.
+        Columns as in tier_changes; only lanes and vendors that changed appear.
+        """
+        before, after = round_label(before), round_label(after)
+        partitions = self._partitions()
+        if lane:
+            shippers = [lane[0]]
+        candidates = shippers if shippers is not None else self.shippers()
+
+        columns = SHIPPER_LANE_COLUMNS + ["vendor", "price", "tier"]
+        frames = []
+        for shipper in candidates:
+            if (shipper, before) not in partitions and (shipper, after) not in partitions:
+                continue
+            old = self.read([shipper], [before], columns, lane, vendor)
+            new = self.read([shipper], [after], columns, lane, vendor)
+            frames.append(tier_changes(old, new))
+        if not frames:
+            return tier_changes(pd.DataFrame(columns=columns), pd.DataFrame(columns=columns))
+        return pd.concat(frames, ignore_index=True)
+
+    def lane_history(self, lane, vendor=None):
+        """Price and tier of every vendor (or just `vendor`) on one lane, round by round."""
+        lane = tuple(lane)
+        if len(lane) != len(SHIPPER_LANE_COLUMNS):
+            raise ValueError(f"lane must be a ({', '.join(SHIPPER_LANE_COLUMNS)}) tuple")
+        df = self.read([lane[0]], lane=lane, vendor=vendor, columns=["round", "vendor", "price", "tier"])
+        return df.sort_values(["round", "tier", "price"], kind="mergesort").reset_index(drop=True)
+
+
+def _and(expression, term):
+    return term if expression is None else expression & term
@@ -0,0 +1,327 @@
+# Workbook ingestion.
+#
+# Each vendor workbook is opened exactly once: the sheet list is read and every
+# shipper sheet we care about is parsed in the same pass. The parsed frames are
+# kept per file so "Generate" can reuse what "Extract" already loaded.
+#
+# A workbook source is either a path on disk or an ArchiveMember, i.e. an .xlsx
+# read straight out of the uploaded bid ZIP without extracting it. Members are
+# decompressed in fixed-size chunks into a spooled temp file, so memory stays
+# bounded however large the archive is, and archives breaking the ARCHIVE_LIMITS
+# are rejected from their directory before anything is decompressed.
+
+import multiprocessing
+import os
+import posixpath
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from tiering.diagnostics import StageTimer, no_progress
+from tiering.schema import AUTO_HEADER, normalize_sheet
+from tiering.transform import clean_sheet, melt_clean_sheet
+
+# ------------------------ CONSTANTS ------------------------ #
+# Shipper sheets the app knows how to tier
+DESIRED_SHEETS = ["OH!SOME", "SPX FTL", "LOTTE"]
+
+# Header row of the shipper sheets: detected per sheet, or a fixed row number
+HEADER_ROW = AUTO_HEADER
+
+# Worker processes used to parse workbooks; 1 keeps everything in-process
+PARSE_WORKERS = int(os.environ.get("TIERING_PARSE_WORKERS", os.cpu_count() or 1))
+
+# Parse workers are started from job threads of a multithreaded server, where
+# forking is unsafe; forkserver/spawn start them from a clean process instead
+PARSE_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Archive members are decompressed this many bytes at a time, and kept in
+# memory up to SPOOL_MAX_BYTES before spilling to a temp file
+COPY_CHUNK_BYTES = 1024 * 1024
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+
+# ------------------------ ERRORS ------------------------ #
+class ArchiveLimitError(ValueError):
+    """Raised when a bid ZIP breaks one of its ArchiveLimits."""
+
+
+# ------------------------ DATA ------------------------ #
+@dataclass(frozen=True)
+class ArchiveLimits:
+    """Bounds a bid ZIP must stay within, checked against its central directory.
+
+    `max_members` counts every entry; `max_total_bytes` and `max_ratio`
+    (uncompressed over compressed size, per member) only the .xlsx members
+    that are going to be read.
+    """
+
+    max_total_bytes: int
+    max_members: int
+    max_ratio: float
+
+
+ARCHIVE_LIMITS = ArchiveLimits(
+    max_total_bytes=int(os.environ.get("TIERING_MAX_UNCOMPRESSED_MB", "1024")) * 1024 * 1024,
+    max_members=int(os.environ.get("TIERING_MAX_ARCHIVE_MEMBERS", "5000")),
+    max_ratio=float(os.environ.get("TIERING_MAX_COMPRESSION_RATIO", "100")),
+)
+
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    """An .xlsx stored inside a ZIP archive on disk."""
+
+    archive: str
+    name: str
+
+    @property
+    def file_name(self):
+        return posixpath.basename(self.name)
+
+    @contextmanager
+    def stream(self):
+        """The member as a forward-only stream, decompressed as it is read."""
+        with zipfile.ZipFile(self.archive) as archive, archive.open(self.name) as member:
+            yield member
+
+    def open(self):
+        """A seekable copy of the member, in memory up to SPOOL_MAX_BYTES and on disk beyond.
+
+        Any temp file goes away when the copy is closed or garbage collected.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            with self.stream() as member:
+                shutil.copyfileobj(member, spool, COPY_CHUNK_BYTES)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+
+
+@dataclass
+class ParsedWorkbook:
+    """One vendor workbook: every sheet name it has plus the parsed shipper sheets.
+
+    `frames` holds sheets as parsed from Excel and narrowed to the canonical
+    columns (see tiering.schema), `rows` holds them already melted
+    into bid rows (see tiering.transform). `content_hash` is set when the
+    workbook went through the parse cache. `stages` holds the per-file
+    diagnostics records of the read/clean/melt steps.
+    """
+
+    source: object
+    sheet_names: list
+    frames: dict = field(default_factory=dict)
+    rows: dict = field(default_factory=dict)
+    content_hash: str = None
+    stages: list = field(default_factory=list)
+
+    @property
+    def file_name(self):
+        return source_name(self.source)
+
+
+# ------------------------ SOURCES ------------------------ #
+def source_name(source):
+    """File name to show for a path or an ArchiveMember."""
+    if isinstance(source, ArchiveMember):
+        return source.file_name
+    return os.path.basename(source)
+
+
+def open_source(source):
+    """Something pandas/zipfile can read: the path itself or a spooled copy."""
+    if isinstance(source, ArchiveMember):
+        return source.open()
+    return source
+
+
+@contextmanager
+def opened_source(source):
+    """open_source() that closes the copy of an ArchiveMember, and its temp file, on exit."""
+    handle = open_source(source)
+    try:
+        yield handle
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+# ------------------------ DISCOVERY ------------------------ #
+def find_excel_files(root):
+    """Return every .xlsx below `root`, in a stable order."""
+    excel_files = []
+    for dirpath, _, files in os.walk(root):
+        for file in files:
+            if file.endswith(".xlsx"):
+                excel_files.append(os.path.join(dirpath, file))
+    return sorted(excel_files)
+
+
+def workbook_entries(infos):
+    """The ZipInfos of `infos` that are vendor workbooks.
+
+    macOS resource-fork entries (__MACOSX/) are skipped; they are not workbooks.
+    """
+    return [
+        info
+        for info in infos
+        if not info.is_dir()
+        and info.filename.endswith(".xlsx")
+        and not info.filename.startswith("__MACOSX/")
+    ]
+
+
+def check_archive_limits(infos, limits=ARCHIVE_LIMITS):
+    """Raise ArchiveLimitError if a ZIP with entries `infos` breaks `limits`.
+
+    Only declared sizes are checked, but zipfile never returns more than a
+    member's declared size, so they also bound what is decompressed later.
+    """
+    if len(infos) > limits.max_members:
+        raise ArchiveLimitError(f"The ZIP has {len(infos)} entries; the limit is {limits.max_members}.")
+    _check_expansion(workbook_entries(infos), limits, "The workbooks in the ZIP expand")
+
+
+def check_workbook_limits(infos, limits=ARCHIVE_LIMITS, name="The workbook"):
+    """Raise ArchiveLimitError if the parts `infos` of one .xlsx break `limits`.
+
+    An .xlsx is a ZIP of its own and openpyxl decompresses its parts without
+    any bound, so they get the same checks as the bid ZIP.
+    """
+    if len(infos) > limits.max_members:
+        raise ArchiveLimitError(f"{name} has {len(infos)} parts; the limit is {limits.max_members}.")
+    _check_expansion(infos, limits, f"{name} expands")
+
+
+def _check_expansion(infos, limits, what):
+    total = sum(info.file_size for info in infos)
+    if total > limits.max_total_bytes:
+        raise ArchiveLimitError(
+            f"{what} to {total / 2**20:,.0f} MB; "
+            f"the limit is {limits.max_total_bytes / 2**20:,.0f} MB."
+        )
+    for info in infos:
+        ratio = info.file_size / max(info.compress_size, 1)
+        if ratio > limits.max_ratio:
+            raise ArchiveLimitError(
+                f"{info.filename} is compressed {ratio:,.0f}:1; the limit is {limits.max_ratio:,.0f}:1."
+            )
+
+
+def archive_members(zip_path, limits=ARCHIVE_LIMITS):
+    """Every .xlsx member of a bid ZIP, in a stable order.
+
+    Only the central directory is read: other members are skipped without
+    being decompressed. Raises ArchiveLimitError when the archive breaks
+    `limits`; None disables the checks.
+    """
+    with zipfile.ZipFile(zip_path) as archive:
+        infos = archive.infolist()
+    if limits is not None:
+        check_archive_limits(infos, limits)
+    return [ArchiveMember(zip_path, name) for name in sorted(info.filename for info in workbook_entries(infos))]
+
+
+# ------------------------ PARSING ------------------------ #
+def read_workbook(source, sheets=DESIRED_SHEETS, header=HEADER_ROW, limits=ARCHIVE_LIMITS):
+    """Open `source` once, list its sheets and parse the ones named in `sheets`.
+
+    `header` is AUTO_HEADER to detect each sheet's header row, or a row number.
+    Raises ArchiveLimitError when the workbook's own parts break `limits`;
+    None disables the checks.
+    """
+    timer = StageTimer(trace_memory=False)
+    with timer.stage("read", file=source_name(source)) as record:
+        with opened_source(source) as handle:
+            if limits is not None:
+                with zipfile.ZipFile(handle) as xlsx:
+                    check_workbook_limits(xlsx.infolist(), limits, source_name(source))
+                if hasattr(handle, "seek"):
+                    handle.seek(0)
+            with pd.ExcelFile(handle) as xls:
+                frames = {
+                    sheet: normalize_sheet(xls.parse(sheet, header=None if header == AUTO_HEADER else header), header)
+                    for sheet in sheets
+                    if sheet in xls.sheet_names
+                }
+                sheet_names = list(xls.sheet_names)
+        record["rows_out"] = sum(len(df) for df in frames.values())
+    return ParsedWorkbook(source=source, sheet_names=sheet_names, frames=frames, stages=timer.stages)
+
+
+def read_bid_rows(source, sheets=DESIRED_SHEETS, header=HEADER_ROW):
+    """Like read_workbook, but keeps each sheet only as melted bid rows."""
+    workbook = read_workbook(source, sheets, header)
+    timer = StageTimer(trace_memory=False)
+    for sheet, df in workbook.frames.items():
+        with timer.stage("clean", len(df), file=workbook.file_name, sheet=sheet) as record:
+            df = clean_sheet(df, sheet)
+            record["rows_out"] = len(df)
+        with timer.stage("melt", len(df), file=workbook.file_name, sheet=sheet) as record:
+            workbook.rows[sheet] = melt_clean_sheet(df)
+            record["rows_out"] = len(workbook.rows[sheet])
+    workbook.frames = {}
+    workbook.stages.extend(timer.stages)
+    return workbook
+
+
+def _read_safe(reader, source, sheets, header):
+    """Worker entry point: never raises, so one bad file cannot sink the pool."""
+    try:
+        return source, reader(source, sheets, header), None
+    except Exception as e:
+        return source, None, e
+
+
+def load_workbooks(
+    paths,
+    sheets=DESIRED_SHEETS,
+    header=HEADER_ROW,
+    workers=1,
+    reader=read_workbook,
+    progress=no_progress,
+):
+    """Read every workbook in `paths` (paths or ArchiveMembers), optionally across a process pool.
+
+    openpyxl parsing is CPU-bound, so `workers > 1` spreads files over that many
+    processes. Results always come back in the order of `paths`, whatever order
+    the workers finish in. `reader` is read_workbook or read_bid_rows.
+    `progress("parse", done, total, file_name)` is called as each file finishes.
+
+    Returns `(workbooks, errors)`: a dict of ParsedWorkbook keyed by source, and
+    a list of `(source, exception)` for the files that could not be read.
+    """
+    paths = list(paths)
+    workers = max(1, min(workers, len(paths)))
+
+    if workers == 1:
+        results = []
+        for path in paths:
+            results.append(_read_safe(reader, path, sheets, header))
+            progress("parse", len(results), len(paths), source_name(path))
+    else:
+        context = multiprocessing.get_context(PARSE_START_METHOD)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(_read_safe, reader, path, sheets, header) for path in paths]
+            for done, future in enumerate(as_completed(futures), 1):
+                progress("parse", done, len(paths), source_name(future.result()[0]))
+        results = [future.result() for future in futures]
+
+    workbooks = {}
+    errors = []
+    for path, workbook, error in results:
+        if error is None:
+            workbooks[path] = workbook
+        else:
+            errors.append((path, error))
+    return workbooks, errors
+
@@ -0,0 +1,115 @@
+# Background jobs for loading and tiering bid rounds.
+#
+# A JobManager runs pipeline calls on a bounded thread pool, so the Streamlit
+# script only submits work and polls it; reruns caused by widget changes no
+# longer throw a run away. Every job exposes its latest progress, and
+# submissions with the same key (e.g. session + archive hash + shippers) share
+# one job while it is queued or running.
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------------ CONSTANTS ------------------------ #
+# Jobs running at once across all sessions; more are queued
+JOB_WORKERS = int(os.environ.get("TIERING_JOB_WORKERS", "2"))
+
+# Seconds between progress refreshes in the apps
+JOB_POLL_SECONDS = 1.0
+
+
+# ------------------------ PROGRESS ------------------------ #
+class JobProgress:
+    """Latest progress report of a job; also the `progress` callback passed to it."""
+
+    def __init__(self):
+        self.stage = "queued"
+        self.done = 0
+        self.total = 0
+        self.detail = ""
+        self.updated = time.time()
+
+    def __call__(self, stage, done=0, total=0, detail=""):
+        self.stage, self.done, self.total, self.detail = stage, done, total, detail
+        self.updated = time.time()
+
+    @property
+    def fraction(self):
+        """Share of the current stage done, 0.0 when it has no known size."""
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+    def describe(self):
+        text = self.stage
+        if self.total:
+            text += f" {self.done}/{self.total}"
+        if self.detail:
+            text += f" ({self.detail})"
+        return text
+
+
+# ------------------------ JOBS ------------------------ #
+class Job:
+    """One submitted call: its key, progress and eventual result."""
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.progress = JobProgress()
+        self.submitted = time.time()
+        self.future = None
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        """The call's return value; re-raises its exception. Blocks until done."""
+        return self.future.result()
+
+    @property
+    def elapsed(self):
+        return time.time() - self.submitted
+
+
+class JobManager:
+    """Bounded pool of background jobs, deduplicated by key.
+
+    `submit(key, fn, ...)` calls `fn(..., progress=job.progress)` on a worker
+    thread. Submitting a key whose job is still queued or running returns that
+    job instead of starting another one.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="tiering-job")
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None and not job.done():
+                return job
+
+            job = Job(key)
+            job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+            self._active[key] = job
+        job.future.add_done_callback(lambda _: self._forget(job))
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.progress("starting")
+        return fn(*args, progress=job.progress, **kwargs)
+
+    def _forget(self, job):
+        with self._lock:
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+
+    def active(self):
+        """Jobs currently queued or running."""
+        with self._lock:
+            return list(self._active.values())
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,114 @@
+# Lane lookup index.
+#
+# Answers point questions such as "the 3 cheapest CDD LONG vendors from Jakarta
+# to Surabaya for LOTTE" without filtering the tiered frame. The index is built
+# once per tiering run: one sort puts every lane's quotes next to each other in
+# tier order (house vendors in Tier 0 first, then by price), and each lane key
+# maps to its slice of those arrays.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from tiering.engine import SHIPPER_LANE_COLUMNS
+from tiering.names import VENDOR_NAMES, canonical_key, name_ids
+
+# ------------------------ CONSTANTS ------------------------ #
+# Vendors returned by top_k() by default
+DEFAULT_TOP_K = 3
+
+# ------------------------ DATA ------------------------ #
+@dataclass(frozen=True)
+class LaneQuote:
+    """One vendor's quote on a lane; `position` is 1-based in tier/price order."""
+
+    position: int
+    vendor: str
+    price: float
+    tier: int
+
+
+# ------------------------ INDEX ------------------------ #
+class LaneIndex:
+    """Price-sorted vendors per lane of a tiered frame.
+
+    Within a lane, quotes are ordered by tier, then price, then input order,
+    so Tier 0 house vendors always come first. Lane keys are tuples in
+    `lane_columns` order, e.g. `(shipper, truck_type, origin, destination)`.
+    City and vendor arguments may use any spelling; they are matched on
+    their name IDs (see tiering.names) and shown as the frame spells them.
+    """
+
+    def __init__(self, tiered_df, lane_columns=SHIPPER_LANE_COLUMNS):
+        self.lane_columns = [col for col in lane_columns if col in tiered_df]
+        df = tiered_df.reset_index(drop=True)
+
+        lane_codes = df.groupby(self.lane_columns, sort=False, observed=True, dropna=True).ngroup().to_numpy()
+        order = np.lexsort((df["price"].to_numpy(), df["tier"].to_numpy(), lane_codes))
+        order = order[lane_codes[order] >= 0]  # Rows with a missing lane key
+        lane_codes = lane_codes[order]
+
+        self.vendors = df["vendor"].to_numpy(dtype=object)[order]
+        self.vendor_ids = VENDOR_NAMES.codes(df["vendor"])[order]
+        self.prices = df["price"].to_numpy()[order]
+        self.tiers = df["tier"].to_numpy()[order]
+
+        # One slice per lane: starts where the lane code changes
+        starts = np.flatnonzero(np.r_[True, lane_codes[1:] != lane_codes[:-1]]) if len(order) else np.empty(0, int)
+        stops = np.r_[starts[1:], len(order)]
+        firsts = order[starts]
+        keys = name_ids(df, self.lane_columns).iloc[firsts].itertuples(index=False, name=None)
+        self.slices = {key: (int(start), int(stop)) for key, start, stop in zip(keys, starts, stops)}
+
+        # Nested {key part: {key part: ...}} of lanes, for cascading pickers,
+        # and how the frame spells each key part
+        labels = df[self.lane_columns].iloc[firsts].itertuples(index=False, name=None)
+        self.tree = {}
+        self.labels = {}
+        for key, label in zip(self.slices, labels):
+            node = self.tree
+            for column, part, text in zip(self.lane_columns, key, label):
+                self.labels[(column, part)] = text
+                node = node.setdefault(part, {})
+
+    def __len__(self):
+        return len(self.slices)
+
+    def __contains__(self, lane):
+        return canonical_key(self.lane_columns, lane) in self.slices
+
+    def choices(self, *prefix):
+        """Sorted values of the next lane column for lanes starting with `prefix`."""
+        node = self.tree
+        for part in canonical_key(self.lane_columns, prefix):
+            node = node.get(part) or {}
+        column = self.lane_columns[min(len(prefix), len(self.lane_columns) - 1)]
+        return sorted((self.labels[(column, part)] for part in node), key=str)
+
+    def _slice(self, lane):
+        try:
+            return self.slices[canonical_key(self.lane_columns, lane)]
+        except KeyError:
+            raise KeyError(f"Unknown lane {tuple(lane)!r}; expected a ({', '.join(self.lane_columns)}) tuple") from None
+
+    def _quote(self, lane_start, i):
+        return LaneQuote(i - lane_start + 1, self.vendors[i], self.prices[i].item(), int(self.tiers[i]))
+
+    def quotes(self, lane, k=None):
+        """LaneQuotes of `lane` in tier/price order, only the first `k` if given."""
+        start, stop = self._slice(lane)
+        if k is not None:
+            stop = min(stop, start + max(k, 0))
+        return [self._quote(start, i) for i in range(start, stop)]
+
+    def top_k(self, lane, k=DEFAULT_TOP_K):
+        """The `k` best quotes on `lane`: Tier 0 house vendors first, then cheapest."""
+        return self.quotes(lane, k)
+
+    def rank_of(self, lane, vendor):
+        """LaneQuote of `vendor` on `lane`, or None when it does not quote the lane."""
+        start, stop = self._slice(lane)
+        hits = np.flatnonzero(self.vendor_ids[start:stop] == VENDOR_NAMES.intern(vendor))
+        if not len(hits):
+            return None
+        return self._quote(start, start + int(hits[0]))
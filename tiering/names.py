@@ -0,0 +1,232 @@
+# Vendor and city name canonicalization.
+#
+# Vendor sheets spell the same city or vendor in many ways: "JAKARTA",
+# "Jakarta ", "DKI Jakarta". Grouping lanes on the raw strings splits one lane
+# into several and ranks vendors against only part of the competition. Every
+# distinct spelling is folded (whitespace collapsed, case folded), looked up in
+# an alias table and interned to an integer ID once per process; a column is
+# then canonicalized through its categorical codes, so the cost depends on the
+# number of distinct names, not on the number of rows.
+#
+# Names are grouped on the folded ID alone, but shown as spelled in the data:
+# an alias target as written, otherwise the spelling most rows of the frame use
+# (the first in sorted order on a tie). The label depends only on the rows, so
+# rows parsed and cached in different runs or worker processes canonicalize
+# alike; frames from different rounds may still show a name differently, so
+# they are compared on name IDs (see name_ids and relabel), never on labels.
+
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ------------------------ CONSTANTS ------------------------ #
+# Built-in aliases: any spelling that folds like a key becomes the value
+DEFAULT_CITY_ALIASES = {
+    "DKI Jakarta": "Jakarta",
+    "Jakarta Raya": "Jakarta",
+    "Jogja": "Yogyakarta",
+    "Jogjakarta": "Yogyakarta",
+    "Yogya": "Yogyakarta",
+}
+DEFAULT_VENDOR_ALIASES = {}
+
+# JSON file with extra aliases, {"city": {alias: name}, "vendor": {alias: name}}
+ALIASES_PATH = os.environ.get("TIERING_NAME_ALIASES")
+
+# Distinct raw spellings kept by fold_name
+CACHED_NAMES = 65536
+
+# Bump when fold_name or the label rules change
+NAME_RULES_VERSION = "2"
+
+CITY_COLUMNS = ["origin_city", "destination_city"]
+VENDOR_COLUMNS = ["vendor"]
+
+
+# ------------------------ FOLDING ------------------------ #
+@lru_cache(maxsize=CACHED_NAMES)
+def fold_name(text):
+    """Whitespace collapsed and case folded; "" for a blank name."""
+    return " ".join(str(text).split()).casefold()
+
+
+def spelling(text):
+    """A raw name with its whitespace collapsed, as it is displayed."""
+    return " ".join(str(text).split())
+
+
+def load_aliases(path=ALIASES_PATH):
+    """`(city_aliases, vendor_aliases)`: the built-in tables updated from the JSON file at `path`."""
+    city, vendor = dict(DEFAULT_CITY_ALIASES), dict(DEFAULT_VENDOR_ALIASES)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            extra = json.load(f)
+        city.update(extra.get("city", {}))
+        vendor.update(extra.get("vendor", {}))
+    return city, vendor
+
+
+# ------------------------ INDEX ------------------------ #
+class NameIndex:
+    """Interned canonical names of one kind (cities or vendors).
+
+    Every raw spelling is resolved once and remembered for the life of the
+    index; IDs are positions in `keys`, the folded canonical names. Safe to
+    share between threads.
+    """
+
+    def __init__(self, aliases=None):
+        # An alias target is canonical too, and keeps its own spelling
+        self.aliases = {}
+        for alias, name in (aliases or {}).items():
+            self.aliases[fold_name(alias)] = name
+            self.aliases.setdefault(fold_name(name), name)
+        self.keys = []
+        self.targets = []  # Alias target of each ID, None without one
+        self._ids = {}  # folded canonical name -> ID
+        self._raw = {}  # raw spelling -> ID
+        self._lock = threading.Lock()
+
+    def intern(self, text):
+        """ID of the canonical name of `text`; -1 for a missing or blank name."""
+        known = self._raw.get(text)
+        if known is not None:
+            return known
+        if text is None or (isinstance(text, float) and np.isnan(text)):
+            return -1
+        folded = fold_name(text)
+        if not folded:
+            name_id = -1
+        else:
+            target = self.aliases.get(folded)
+            key = fold_name(target) if target is not None else folded
+            with self._lock:
+                name_id = self._ids.setdefault(key, len(self.keys))
+                if name_id == len(self.keys):
+                    self.keys.append(key)
+                    self.targets.append(target)
+        self._raw[text] = name_id
+        return name_id
+
+    def _category_ids(self, categories):
+        return np.fromiter((self.intern(value) for value in categories), dtype=np.int64, count=len(categories))
+
+    def codes(self, values):
+        """Canonical name IDs of a Series, looked up once per distinct value."""
+        values = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+        ids = self._category_ids(values.cat.categories)
+        # A trailing -1 lets the -1 code of missing values map to -1 as well
+        return np.append(ids, -1)[values.cat.codes.to_numpy()]
+
+    def labels(self, values):
+        """`{ID: label}` of the names in `values`: alias target, else the most used spelling."""
+        values = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+        ids = self._category_ids(values.cat.categories)
+        counts = np.bincount(values.cat.codes.to_numpy() + 1, minlength=len(ids) + 1)[1:]
+
+        # Spellings differing only in whitespace count as one
+        used = {}
+        for name_id, value, count in zip(ids.tolist(), values.cat.categories, counts.tolist()):
+            if name_id >= 0:
+                key = (name_id, spelling(value))
+                used[key] = used.get(key, 0) + count
+
+        best = {}
+        for (name_id, text), count in used.items():
+            if name_id not in best or (-count, text) < best[name_id]:
+                best[name_id] = (-count, text)
+        return {name_id: self.targets[name_id] or text for name_id, (_, text) in best.items()}
+
+    def canonicalize(self, values, labels=None):
+        """Categorical Series of `values` with one label per name, blanks as NaN.
+
+        Labels come from `labels` (`{ID: label}`) where given, else from
+        the values themselves (see labels()).
+        """
+        values = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+        ids = self._category_ids(values.cat.categories)
+        labels = {**self.labels(values), **(labels or {})}
+        if len(set(ids.tolist()) - {-1}) == len(ids) and all(
+            labels[name_id] == value for name_id, value in zip(ids.tolist(), values.cat.categories)
+        ):
+            return values  # Already canonical, as most columns are
+
+        # Recode the categories first (few), then the rows with a single take
+        used = np.unique(ids[ids >= 0])
+        names = [labels[name_id] for name_id in used.tolist()]
+        order = np.argsort(np.array(names, dtype=object), kind="stable")
+        position = np.empty(len(used), dtype=np.int64)
+        position[order] = np.arange(len(used))
+        category_codes = np.full(len(ids), -1, dtype=np.int64)
+        category_codes[ids >= 0] = position[np.searchsorted(used, ids[ids >= 0])]
+        codes = np.append(category_codes, -1)[values.cat.codes.to_numpy()]
+        categories = pd.Categorical.from_codes(codes, [names[i] for i in order])
+        return pd.Series(categories, index=values.index, name=values.name)
+
+
+_CITY_ALIASES, _VENDOR_ALIASES = load_aliases()
+CITY_NAMES = NameIndex(_CITY_ALIASES)
+VENDOR_NAMES = NameIndex(_VENDOR_ALIASES)
+
+# Part of every cache key, so rows canonicalized under other aliases or rules are not reused
+NAMES_VERSION = hashlib.sha256(
+    json.dumps([NAME_RULES_VERSION, _CITY_ALIASES, _VENDOR_ALIASES], sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+
+def name_index(column):
+    """The NameIndex of bid row column `column`, None for other columns."""
+    if column in CITY_COLUMNS:
+        return CITY_NAMES
+    if column in VENDOR_COLUMNS:
+        return VENDOR_NAMES
+    return None
+
+
+def canonical_value(column, value):
+    """`value` of bid row column `column` as compared between frames: vendor and city names as IDs."""
+    index = name_index(column)
+    return value if index is None else index.intern(value)
+
+
+def canonical_key(columns, key):
+    """A lane key (or a prefix of one) in `columns` order, with city and vendor name IDs."""
+    return tuple(canonical_value(column, value) for column, value in zip(columns, key))
+
+
+def name_ids(df, columns):
+    """`df[columns]` with vendor and city columns as name IDs, so every spelling of a name matches."""
+    ids = df[columns].copy(deep=False)
+    for col in columns:
+        index = name_index(col)
+        if index is not None:
+            ids[col] = index.codes(df[col])
+    return ids
+
+
+def canonical_names(df):
+    """Copy of bid rows with each vendor and city name spelled one way (see NameIndex.labels)."""
+    df = df.copy(deep=False)
+    for col in df.columns:
+        index = name_index(col)
+        if index is not None:
+            df[col] = index.canonicalize(df[col])
+    return df
+
+
+def relabel(df, reference):
+    """Copy of canonical bid rows `df` with names spelled as in `reference`.
+
+    Names that `reference` does not hold keep their own spelling.
+    """
+    df = df.copy(deep=False)
+    for col in df.columns:
+        index = name_index(col)
+        if index is not None and col in reference:
+            df[col] = index.canonicalize(df[col], index.labels(reference[col]))
+    return df
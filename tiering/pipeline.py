@@ -0,0 +1,220 @@
+# Headless tiering pipeline.
+#
+# extract -> normalize -> melt -> tier -> export, without Streamlit. The apps
+# and the command line (python -m tiering) are both thin clients of the
+# functions below.
+
+import os
+import zipfile
+from dataclasses import dataclass, field
+
+from tiering.diagnostics import StageTimer, no_progress
+from tiering.discovery import discover_files
+from tiering.engine import HOUSE_VENDOR_PATTERN, SHIPPER_LANE_COLUMNS
+from tiering.export import format_output, write_output
+from tiering.ingest import DESIRED_SHEETS, HEADER_ROW, ArchiveLimitError, archive_members, find_excel_files
+from tiering.rounds import batch_rows, load_round, tier_round
+from tiering.transform import combine_bid_rows
+
+# ------------------------ CONSTANTS ------------------------ #
+# Pseudo shipper the apps offer for tiering every shipper sheet in one batch
+ALL_SHIPPERS = "All Shippers"
+
+
+# ------------------------ ERRORS ------------------------ #
+class PipelineError(Exception):
+    """Raised when a bid round cannot produce any tiers."""
+
+
+# ------------------------ DATA ------------------------ #
+@dataclass
+class BidRound:
+    """Everything read from one bid archive or directory."""
+
+    sources: list
+    sheet_map: dict
+    workbooks: dict
+    errors: list = field(default_factory=list)
+
+    @property
+    def sheet_names(self):
+        """Sorted union of the sheet names of every workbook."""
+        return sorted({sheet for names in self.sheet_map.values() for sheet in names})
+
+    @property
+    def shipper_sheets(self):
+        """The supported shipper sheets present in this round, in DESIRED_SHEETS order."""
+        return [sheet for sheet in DESIRED_SHEETS if sheet in self.sheet_names]
+
+
+@dataclass
+class TierRun:
+    """Result of tiering a bid round for some shippers.
+
+    Only the tiered rows are kept; the combined bid rows they came from can be
+    rebuilt from the round's workbooks (see tiering.rounds.batch_rows).
+    """
+
+    shippers: list
+    tiered: object
+    recomputed_lanes: int = None
+
+
+# ------------------------ STAGES ------------------------ #
+def collect_sources(path):
+    """Workbook sources for a bid ZIP, a directory or a single .xlsx."""
+    if not os.path.exists(path):
+        raise PipelineError(f"{path} does not exist")
+    if os.path.isdir(path):
+        return find_excel_files(path)
+    if path.endswith(".xlsx"):
+        return [path]
+    if zipfile.is_zipfile(path):
+        try:
+            return archive_members(path)
+        except ArchiveLimitError as e:
+            raise PipelineError(f"{path}: {e}") from e
+    raise PipelineError(f"{path} is not a ZIP file, a directory or an .xlsx workbook")
+
+
+def load_bids(
+    sources,
+    sheets=DESIRED_SHEETS,
+    header=HEADER_ROW,
+    workers=1,
+    cache=None,
+    timer=None,
+    progress=no_progress,
+):
+    """Discover sheet names and read the shipper sheets of every workbook once.
+
+    `timer` (a StageTimer) receives the discovery and parse stages plus the
+    per-file records of every workbook that was actually parsed. `progress`
+    is called per stage and per file (see tiering.diagnostics.no_progress).
+    """
+    timer = timer if timer is not None else StageTimer(trace_memory=False)
+    sources = list(sources)
+    progress("discovery", 0, len(sources))
+    with timer.stage("discovery", len(sources)) as record:
+        sheet_map, errors = discover_files(sources)
+
+        # Only workbooks that carry a shipper sheet are read, and only if not cached yet
+        shipper_files = [source for source, names in sheet_map.items() if set(names) & set(sheets)]
+        record["rows_out"] = len(shipper_files)
+
+    with timer.stage("parse", len(shipper_files), workers=workers) as record:
+        workbooks, load_errors = load_round(shipper_files, sheet_map, sheets, header, workers, cache, progress)
+        record["rows_out"] = sum(len(df) for wb in workbooks.values() for df in wb.rows.values())
+        record["parsed_files"] = sum(1 for wb in workbooks.values() if wb.stages)
+    for workbook in workbooks.values():
+        timer.extend(workbook.stages)
+    return BidRound(sources, sheet_map, workbooks, errors + load_errors)
+
+
+def generate_tiers(
+    bid_round,
+    shippers,
+    method="dense",
+    house_pattern=HOUSE_VENDOR_PATTERN,
+    header=HEADER_ROW,
+    cache=None,
+    timer=None,
+    progress=no_progress,
+    history=None,
+    round_date=None,
+):
+    """Tier the bid rows of `shippers`, with shipper as part of the lane key.
+
+    Tiering one shipper at a time and tiering several together give the same
+    tiers, since the shipper is part of every lane. `timer` receives the
+    combine and tier stages, `progress` is told when each one starts. With a
+    HistoryStore as `history`, the result is appended as round `round_date`.
+    """
+    timer = timer if timer is not None else StageTimer(trace_memory=False)
+    shippers = list(shippers)
+    rows_by_key = batch_rows(bid_round.workbooks, shippers, header)
+    if not rows_by_key:
+        raise PipelineError(f"No workbook contains a sheet named {', '.join(shippers)}.")
+
+    progress("combine")
+    with timer.stage("combine", sum(len(df) for df in rows_by_key.values())) as record:
+        rows = combine_bid_rows(rows_by_key.values())
+        record["rows_out"] = len(rows)
+    if rows.empty:
+        raise PipelineError("No valid truck type columns found in the data. Please check the uploaded files.")
+
+    progress("tier", 0, len(rows))
+    with timer.stage("tier", len(rows), shippers=shippers) as record:
+        tiered, recomputed = tier_round(
+            rows_by_key,
+            ",".join(shippers),
+            method,
+            house_pattern,
+            cache=cache,
+            rows=rows,
+            lane_columns=SHIPPER_LANE_COLUMNS,
+        )
+        record["rows_out"] = len(tiered)
+        record["recomputed_lanes"] = recomputed
+
+    save_history(history, tiered, round_date, timer, progress)
+    return TierRun(shippers, tiered, recomputed)
+
+
+def save_history(history, tiered, round_date=None, timer=None, progress=no_progress):
+    """Append a tiered result to a HistoryStore as round `round_date`; no-op without one."""
+    if history is None:
+        return []
+    timer = timer if timer is not None else StageTimer(trace_memory=False)
+    progress("history", 0, len(tiered))
+    with timer.stage("history", len(tiered)) as record:
+        paths = history.append(tiered, round_date)
+        record["files_written"] = len(paths)
+    return paths
+
+
+# ------------------------ END TO END ------------------------ #
+def run_pipeline(
+    path,
+    shippers=None,
+    output=None,
+    method="dense",
+    house_pattern=HOUSE_VENDOR_PATTERN,
+    workers=1,
+    cache=None,
+    timer=None,
+    progress=no_progress,
+    history=None,
+    round_date=None,
+):
+    """Tier a bid ZIP or directory in one call.
+
+    `shippers` defaults to every supported shipper sheet found. When `output`
+    is given, the formatted result is written there, and with `history` it is
+    also appended to that HistoryStore as round `round_date`. Returns
+    `(bid_round, tier_run, output_df)`.
+    """
+    timer = timer if timer is not None else StageTimer(trace_memory=False)
+    bid_round = load_bids(collect_sources(path), workers=workers, cache=cache, timer=timer, progress=progress)
+    shippers = list(shippers) if shippers else bid_round.shipper_sheets
+    if not shippers:
+        raise PipelineError(f"No matching sheets found in {path}.")
+
+    tier_run = generate_tiers(
+        bid_round,
+        shippers,
+        method,
+        house_pattern,
+        cache=cache,
+        timer=timer,
+        progress=progress,
+        history=history,
+        round_date=round_date,
+    )
+    output_df = format_output(tier_run.tiered)
+    if output:
+        progress("export", 0, len(output_df))
+        with timer.stage("export", len(output_df), path=str(output)) as record:
+            write_output(output_df, output)
+            record["rows_out"] = len(output_df)
+    return bid_round, tier_run, output_df
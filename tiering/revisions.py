@@ -0,0 +1,184 @@
+# Mid-round bid revisions.
+#
+# A vendor who sends a corrected workbook should not cost a re-upload of the
+# whole round. apply_revision() parses only the replacement workbooks, swaps
+# them in for the workbooks they replace, re-tiers just the lanes the old or
+# new rows touch and reports which tiers changed.
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from tiering.diagnostics import StageTimer, no_progress
+from tiering.discovery import discover_files
+from tiering.engine import HOUSE_VENDOR_PATTERN, SHIPPER_LANE_COLUMNS, lane_index, retier_lanes, tier_changes
+from tiering.ingest import DESIRED_SHEETS, HEADER_ROW, ArchiveMember
+from tiering.pipeline import BidRound, PipelineError, TierRun, save_history
+from tiering.rounds import batch_rows, load_round, result_name
+from tiering.transform import combine_bid_rows, compact_bid_rows
+
+# ------------------------ DATA ------------------------ #
+@dataclass
+class Revision:
+    """Result of applying replacement workbooks to a tiered round.
+
+    `changes` has one row per vendor quote whose tier or price changed, or that
+    appeared or disappeared, on the re-tiered lanes (see tier_changes).
+    `errors` lists the revised workbooks that could not be read.
+    """
+
+    bid_round: BidRound
+    tier_run: TierRun
+    changes: object
+    replaced: list
+    recomputed_lanes: int
+    errors: list
+
+
+# ------------------------ HELPERS ------------------------ #
+def workbook_vendors(workbook):
+    """Distinct vendor names across the parsed sheets of a workbook."""
+    vendors = set()
+    for df in workbook.rows.values():
+        vendors.update(df["vendor"].dropna().unique())
+    return vendors
+
+
+def _member_path(source):
+    return source.name if isinstance(source, ArchiveMember) else str(source)
+
+
+def replaced_sources(workbooks, revised):
+    """Sources in `workbooks` that the `revised` workbooks replace.
+
+    A revision replaces the workbook with the same file name. Only when no
+    file name matches does it replace the one workbook whose vendors it all
+    quotes for; with no such workbook it is a new one. Raises PipelineError
+    when a revision matches several workbooks either way, since a vendor may
+    split its rates over several files.
+    """
+    by_name = {}
+    for source, workbook in workbooks.items():
+        by_name.setdefault(workbook.file_name, []).append(source)
+
+    replaced = set()
+    for workbook in revised.values():
+        matches = list(by_name.get(workbook.file_name, []))
+        if not matches:
+            vendors = workbook_vendors(workbook)
+            for source, old in workbooks.items():
+                own = workbook_vendors(old)
+                if own and own <= vendors:
+                    matches.append(source)
+            if len(matches) > 1:
+                paths = ", ".join(_member_path(source) for source in matches)
+                raise PipelineError(
+                    f"{workbook.file_name} quotes for the vendors of several workbooks in the round ({paths}); "
+                    "name it like the workbook it revises."
+                )
+        elif len(matches) > 1:
+            paths = ", ".join(_member_path(source) for source in matches)
+            raise PipelineError(f"{workbook.file_name} matches several workbooks in the round ({paths}); cannot tell which one it revises.")
+        replaced.update(matches)
+
+    # In the order of the round
+    return [source for source in workbooks if source in replaced]
+
+
+def lane_rows(df, lanes, lane_columns=SHIPPER_LANE_COLUMNS):
+    """Rows of `df` on one of the lanes in the `lanes` key frame."""
+    return df[lane_index(df, lane_columns).isin(lane_index(lanes, lane_columns))]
+
+
+# ------------------------ REVISION ------------------------ #
+def apply_revision(
+    bid_round,
+    tier_run,
+    sources,
+    method="dense",
+    house_pattern=HOUSE_VENDOR_PATTERN,
+    header=HEADER_ROW,
+    workers=1,
+    cache=None,
+    timer=None,
+    progress=no_progress,
+    history=None,
+    round_date=None,
+):
+    """Swap replacement workbooks into a tiered round and re-tier only their lanes.
+
+    `tier_run` must come from generate_tiers on `bid_round` with the same
+    `method` and `house_pattern`. Revised workbooks are read for every
+    shipper sheet, since they replace every sheet of the workbooks they
+    revise, but only lanes of the tiered shippers are re-tiered: those the
+    replaced or the replacing workbooks quote on. Every other lane keeps its tiers.
+    With `history`, the revised result is appended as round `round_date`.
+    Raises PipelineError when none of `sources` can be read or a revision's
+    file name is ambiguous.
+    """
+    timer = timer if timer is not None else StageTimer(trace_memory=False)
+    sources = list(sources)
+    shippers = tier_run.shippers
+
+    progress("revision", 0, len(sources))
+    with timer.stage("revision_parse", len(sources)) as record:
+        sheet_map, errors = discover_files(sources)
+        revised, load_errors = load_round(sources, sheet_map, DESIRED_SHEETS, header, workers, cache, progress)
+        errors += load_errors
+        record["rows_out"] = sum(len(df) for wb in revised.values() for df in wb.rows.values())
+    for workbook in revised.values():
+        timer.extend(workbook.stages)
+    if not revised:
+        raise PipelineError("None of the revised workbooks could be read.")
+
+    replaced = replaced_sources(bid_round.workbooks, revised)
+
+    # The round with revisions in place of what they replace, keeping file order
+    workbooks = {}
+    for source, workbook in bid_round.workbooks.items():
+        if source not in replaced:
+            workbooks[source] = workbook
+    workbooks.update(revised)
+    new_round = BidRound(
+        [source for source in bid_round.sources if source not in replaced] + list(revised),
+        {**{s: names for s, names in bid_round.sheet_map.items() if s not in replaced}, **sheet_map},
+        workbooks,
+        bid_round.errors + errors,
+    )
+
+    progress("tier", 0, 0)
+    with timer.stage("revision_tier") as record:
+        touched = [bid_round.workbooks[source] for source in replaced] + list(revised.values())
+        lane_frames = [
+            df[SHIPPER_LANE_COLUMNS]
+            for workbook in touched
+            for sheet, df in workbook.rows.items()
+            if sheet in shippers and not df.empty
+        ]
+        lanes = pd.concat(lane_frames, ignore_index=True).drop_duplicates() if lane_frames else None
+
+        rows_by_key = batch_rows(workbooks, shippers, header)
+        rows = combine_bid_rows(rows_by_key.values())
+        if lanes is None:
+            tiered = tier_run.tiered
+        else:
+            tiered = compact_bid_rows(
+                retier_lanes(tier_run.tiered, rows, lanes, method, SHIPPER_LANE_COLUMNS, house_pattern)
+            )
+        record["rows_in"] = len(rows)
+        record["rows_out"] = len(tiered)
+        record["recomputed_lanes"] = 0 if lanes is None else len(lanes)
+
+    if cache is not None:
+        # The next Generate on this round starts from the revised tiers
+        name = result_name(",".join(shippers), method, house_pattern, SHIPPER_LANE_COLUMNS)
+        cache.put_result(name, tiered, rows_by_key.keys())
+
+    if lanes is None:
+        changes = tier_changes(tiered.iloc[:0], tiered.iloc[:0])
+    else:
+        changes = tier_changes(lane_rows(tier_run.tiered, lanes), lane_rows(tiered, lanes))
+    save_history(history, tiered, round_date, timer, progress)
+
+    new_run = TierRun(shippers, tiered, 0 if lanes is None else len(lanes))
+    return Revision(new_round, new_run, changes, replaced, new_run.recomputed_lanes, errors)
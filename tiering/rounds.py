@@ -0,0 +1,155 @@
+# Bid rounds: cached ingestion and incremental re-tiering.
+#
+# Loading a round hashes every shipper workbook and only parses the ones whose
+# sheets are not in the parse cache yet. Tiering a round compares the sheets it
+# is built from with the last saved result and re-tiers only the lanes that new,
+# changed or removed workbooks touch.
+
+import pandas as pd
+
+from tiering.cache import CACHE_VERSION, cache_key, content_hash
+from tiering.diagnostics import no_progress
+from tiering.engine import HOUSE_VENDOR_PATTERN, LANE_COLUMNS, assign_tiers, retier_lanes
+from tiering.ingest import DESIRED_SHEETS, HEADER_ROW, ParsedWorkbook, load_workbooks, read_bid_rows, source_name
+from tiering.names import NAMES_VERSION
+from tiering.transform import combine_bid_rows, compact_bid_rows
+
+
+# ------------------------ LOADING ------------------------ #
+def load_round(
+    sources,
+    sheet_map,
+    sheets=DESIRED_SHEETS,
+    header=HEADER_ROW,
+    workers=1,
+    cache=None,
+    progress=no_progress,
+):
+    """Bid rows for every shipper sheet of every workbook in `sources`.
+
+    `sheet_map` is the discovery result (`{source: [sheet, ...]}`) and tells
+    which sheets each workbook has without opening it. Without a cache every
+    workbook is parsed. Returns `(workbooks, errors)` like load_workbooks, with
+    each ParsedWorkbook holding `rows` and its `content_hash`. `progress` gets
+    a "cache" call per workbook looked up and a "parse" call per workbook read.
+    """
+    workbooks = {}
+    errors = []
+    to_parse = []
+
+    for done, source in enumerate(sources, 1):
+        wanted = [sheet for sheet in sheets if sheet in sheet_map.get(source, [])]
+        if cache is None:
+            to_parse.append(source)
+            continue
+        try:
+            digest = content_hash(source)
+        except Exception as e:
+            errors.append((source, e))
+            continue
+
+        cached = {sheet: cache.get(cache_key(digest, sheet, header)) for sheet in wanted}
+        workbooks[source] = ParsedWorkbook(
+            source=source,
+            sheet_names=list(sheet_map.get(source, [])),
+            rows=cached,
+            content_hash=digest,
+        )
+        if any(df is None for df in cached.values()):
+            to_parse.append(source)
+        progress("cache", done, len(sources), source_name(source))
+
+    parsed, parse_errors = load_workbooks(to_parse, sheets, header, workers, reader=read_bid_rows, progress=progress)
+    errors.extend(parse_errors)
+
+    for source, workbook in parsed.items():
+        if source in workbooks:
+            workbook.content_hash = workbooks[source].content_hash
+            for sheet, df in workbook.rows.items():
+                cache.put(cache_key(workbook.content_hash, sheet, header), df)
+        workbooks[source] = workbook
+
+    # Keep the order of `sources` and drop workbooks whose parse failed
+    failed = {source for source, _ in parse_errors}
+    ordered = {source: workbooks[source] for source in sources if source in workbooks and source not in failed}
+    return ordered, errors
+
+
+def sheet_rows(workbooks, sheet_name, header=HEADER_ROW):
+    """`{key: bid rows}` for one shipper sheet, in workbook order.
+
+    Keys are cache keys when the workbook has a content hash, else the
+    (source, sheet) pair; file names alone repeat across ZIP folders.
+    """
+    rows = {}
+    for workbook in workbooks.values():
+        if sheet_name in workbook.rows:
+            if workbook.content_hash is not None:
+                key = cache_key(workbook.content_hash, sheet_name, header)
+            else:
+                key = (workbook.source, sheet_name)
+            rows[key] = workbook.rows[sheet_name]
+    return rows
+
+
+def batch_rows(workbooks, sheets=DESIRED_SHEETS, header=HEADER_ROW):
+    """`{key: bid rows}` for every shipper sheet in `sheets`, sheet by sheet.
+
+    The rows already carry their shipper, so they can be tiered together with
+    SHIPPER_LANE_COLUMNS as the lane key.
+    """
+    rows = {}
+    for sheet in sheets:
+        rows.update(sheet_rows(workbooks, sheet, header))
+    return rows
+
+
+# ------------------------ TIERING ------------------------ #
+def result_name(sheet_name, method, house_pattern, lane_columns=LANE_COLUMNS):
+    return f"{CACHE_VERSION}|{NAMES_VERSION}|{sheet_name}|{method}|{house_pattern or ''}|{','.join(lane_columns)}"
+
+
+def tier_round(
+    rows_by_key,
+    sheet_name,
+    method="dense",
+    house_pattern=HOUSE_VENDOR_PATTERN,
+    cache=None,
+    rows=None,
+    lane_columns=LANE_COLUMNS,
+):
+    """Tier one shipper sheet (or a batch of them), reusing the last cached result where possible.
+
+    `rows` may pass in `combine_bid_rows(rows_by_key.values())` when the caller
+    already has it. Returns `(tiered_df, recomputed_lanes)`; `recomputed_lanes` is None after a
+    full run. Falls back to a full run when there is no previous result or the
+    rows of a removed workbook are no longer cached.
+    """
+    if rows is None:
+        rows = combine_bid_rows(rows_by_key.values())
+    if cache is None:
+        return assign_tiers(rows, method, lane_columns, house_pattern), None
+
+    name = result_name(sheet_name, method, house_pattern, lane_columns)
+    previous = cache.get_result(name)
+    tiered, recomputed = None, None
+
+    if previous is not None:
+        previous_df, previous_keys = previous
+        known = set(previous_keys)
+        added = [key for key in rows_by_key if key not in known]
+        removed = [key for key in previous_keys if key not in rows_by_key]
+        removed_rows = [cache.get(key) for key in removed]
+
+        if all(df is not None for df in removed_rows):
+            touched = [rows_by_key[key] for key in added] + removed_rows
+            lane_frames = [df[lane_columns] for df in touched if not df.empty]
+            lanes = pd.concat(lane_frames, ignore_index=True) if lane_frames else rows[lane_columns].iloc[:0]
+            tiered = compact_bid_rows(retier_lanes(previous_df, rows, lanes, method, lane_columns, house_pattern))
+            recomputed = len(lanes.drop_duplicates())
+
+    if tiered is None:
+        tiered = assign_tiers(rows, method, lane_columns, house_pattern)
+
+    cache.put_result(name, tiered, rows_by_key.keys())
+    return tiered, recomputed
@@ -0,0 +1,122 @@
+# Header schema resolution.
+#
+# Vendor sheets share a template but not exact headers: stray spaces, trailing
+# dots, "#REF!" leftovers, blank "Unnamed: N" columns, different casing and
+# sometimes a different header row. Each sheet is mapped to the canonical
+# VENDOR / Origin City / Destination City / truck type columns on its own,
+# before any concat, and the mapping is memoized by the raw header values so
+# identically laid-out workbooks resolve their header once.
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import pandas as pd
+
+from tiering.transform import ID_COLUMNS, PREDEFINED_TRUCK_TYPES
+
+# ------------------------ CONSTANTS ------------------------ #
+# `header` value that detects the header row of every sheet
+AUTO_HEADER = "auto"
+
+# Row holding the column headers in the vendor bid template; used when no row
+# of a sheet looks like a header
+TEMPLATE_HEADER_ROW = 1
+
+# Top rows of a sheet searched for the header
+HEADER_SCAN_ROWS = 10
+
+# Canonical columns a row needs before it counts as the header
+MIN_HEADER_MATCHES = 2
+
+# Distinct header signatures kept by resolve_header, and header cells by fold_header
+CACHED_SIGNATURES = 1024
+CACHED_CELLS = 16384
+
+# What clean_columns strips from a header: "Unnamed: N", "#REF!", trailing dots
+_JUNK = re.compile(r"Unnamed: \d+|#REF!")
+_TRAILING_DOTS = re.compile(r"\.+$")
+
+CANONICAL_COLUMNS = ID_COLUMNS + PREDEFINED_TRUCK_TYPES
+
+
+# ------------------------ MATCHING ------------------------ #
+@lru_cache(maxsize=CACHED_CELLS)
+def fold_header(text):
+    """One header cell cleaned like clean_columns, whitespace collapsed and case folded."""
+    text = _TRAILING_DOTS.sub("", _JUNK.sub("", text.strip()))
+    return " ".join(text.split()).casefold()
+
+
+_CANONICAL_BY_FOLDED = {fold_header(col): col for col in CANONICAL_COLUMNS}
+
+
+def header_signature(values):
+    """Hashable form of one row of header cells; blank cells become ""."""
+    return tuple("" if pd.isna(value) else str(value) for value in values)
+
+
+@dataclass(frozen=True)
+class HeaderSchema:
+    """Positions of the canonical columns in a sheet, and their canonical names.
+
+    Only the first column mapping to a canonical name is kept.
+    """
+
+    positions: tuple
+    columns: tuple
+
+    @property
+    def id_matches(self):
+        return sum(1 for col in self.columns if col in ID_COLUMNS)
+
+    @property
+    def is_header(self):
+        return len(self.columns) >= MIN_HEADER_MATCHES and self.id_matches > 0
+
+
+@lru_cache(maxsize=CACHED_SIGNATURES)
+def resolve_header(signature):
+    """HeaderSchema for a header signature; memoized, so repeats are free."""
+    positions, columns = [], []
+    for position, text in enumerate(signature):
+        canonical = _CANONICAL_BY_FOLDED.get(fold_header(text))
+        if canonical is not None and canonical not in columns:
+            positions.append(position)
+            columns.append(canonical)
+    return HeaderSchema(tuple(positions), tuple(columns))
+
+
+def detect_header_row(raw, scan_rows=HEADER_SCAN_ROWS):
+    """`(row, schema)` for the first of the top rows of `raw` that looks like a header.
+
+    `raw` is a sheet read without a header. Falls back to TEMPLATE_HEADER_ROW
+    when no row looks like a header.
+    """
+    for row, values in enumerate(raw.head(scan_rows).itertuples(index=False, name=None)):
+        schema = resolve_header(header_signature(values))
+        if schema.is_header:
+            return row, schema
+    row = min(TEMPLATE_HEADER_ROW, max(len(raw) - 1, 0))
+    values = raw.iloc[row] if len(raw) else []
+    return row, resolve_header(header_signature(values))
+
+
+# ------------------------ NORMALIZATION ------------------------ #
+def normalize_sheet(df, header=AUTO_HEADER):
+    """Narrow frame of the canonical columns of one parsed sheet.
+
+    With AUTO_HEADER, `df` is the sheet read with `header=None` and the header
+    row is detected. Otherwise `df` was read with that header row and only its
+    columns are resolved.
+    """
+    if header == AUTO_HEADER:
+        row, schema = detect_header_row(df)
+        body = df.iloc[row + 1:]
+    else:
+        schema = resolve_header(header_signature(df.columns))
+        body = df
+
+    body = body.iloc[:, list(schema.positions)]
+    body.columns = list(schema.columns)
+    return body.reset_index(drop=True)
@@ -0,0 +1,75 @@
+# Aggregated views of a tiered result.
+#
+# The preview's default view: per vendor, how many lanes it quotes and how
+# often it is the cheapest (Tier 1); per lane, how many vendors quote it and
+# how far their prices spread. Both are computed once per tiering run with a
+# couple of groupbys on lane codes and are small enough to send to the browser
+# whole, unlike the row-level data.
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from tiering.engine import SHIPPER_LANE_COLUMNS
+
+# ------------------------ CONSTANTS ------------------------ #
+# Lanes shown by the apps, widest relative price spread first
+SUMMARY_TOP_LANES = 100
+
+
+# ------------------------ DATA ------------------------ #
+@dataclass
+class TierSummary:
+    """Per-vendor and per-lane aggregates of one tiered result.
+
+    `vendors`: vendor, lanes, tier_1_lanes, tier_1_share, house (Tier 0) lanes.
+    `lanes`: the lane columns, vendors, min/max/median price, spread and
+    spread_pct (spread over the lowest price), widest relative spread first.
+    """
+
+    vendors: object
+    lanes: object
+
+
+# ------------------------ SUMMARIES ------------------------ #
+def summarize(tiered_df, lane_columns=SHIPPER_LANE_COLUMNS):
+    """TierSummary of a tiered frame; lane columns it lacks (e.g. shipper) are skipped."""
+    lane_columns = [col for col in lane_columns if col in tiered_df]
+    df = tiered_df.reset_index(drop=True)
+    lane_codes = df.groupby(lane_columns, sort=False, observed=True, dropna=True).ngroup().to_numpy()
+    tiers = df["tier"].to_numpy()
+
+    # A vendor counts once per lane, however many rows it has there
+    quotes = pd.DataFrame({
+        "vendor": df["vendor"].to_numpy(dtype=object),
+        "lane": lane_codes,
+        "tier_1": tiers == 1,
+        "house": tiers == 0,
+    })
+    quotes = quotes[quotes["lane"] >= 0]
+    per_lane = quotes.groupby(["vendor", "lane"], sort=False).agg(tier_1=("tier_1", "any"), house=("house", "any"))
+    vendors = per_lane.groupby(level="vendor", sort=False).agg(
+        lanes=("tier_1", "size"),
+        tier_1_lanes=("tier_1", "sum"),
+        house_lanes=("house", "sum"),
+    )
+    vendors["tier_1_share"] = vendors["tier_1_lanes"] / vendors["lanes"]
+    vendors = (
+        vendors.reset_index()
+        .sort_values(["tier_1_lanes", "lanes"], ascending=False, kind="stable")
+        [["vendor", "lanes", "tier_1_lanes", "tier_1_share", "house_lanes"]]
+        .reset_index(drop=True)
+    )
+
+    prices = df[lane_columns + ["vendor", "price"]]
+    lanes = prices.groupby(lane_columns, sort=False, observed=True, dropna=True).agg(
+        vendors=("vendor", "nunique"),
+        min_price=("price", "min"),
+        median_price=("price", "median"),
+        max_price=("price", "max"),
+    )
+    lanes["spread"] = lanes["max_price"] - lanes["min_price"]
+    lanes["spread_pct"] = np.where(lanes["min_price"] > 0, lanes["spread"] / lanes["min_price"], np.nan)
+    lanes = lanes.reset_index().sort_values("spread_pct", ascending=False, kind="stable", na_position="last")
+    return TierSummary(vendors, lanes.reset_index(drop=True))
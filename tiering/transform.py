@@ -0,0 +1,126 @@
+# Sheet normalization: header cleanup and reshaping into one row per price.
+#
+# Each vendor sheet is turned into "bid rows" on its own, so a sheet can be
+# cached and reused without concatenating it with the rest of the round first.
+
+import numpy as np
+import pandas as pd
+
+from tiering.names import canonical_names
+
+# ------------------------ CONSTANTS ------------------------ #
+# Predefined truck types
+PREDEFINED_TRUCK_TYPES = ['VAN BOX', 'BLINDVAN', 'CDE', 'CDE LONG', 'CDD', 'CDD LONG', 'FUSO', 'FUSO LONG', 'TRONTON WINGBOX']
+
+# Required ID columns, as they appear in the vendor template
+ID_COLUMNS = ['VENDOR', 'Origin City', 'Destination City']
+
+ID_COLUMN_NAMES = {
+    'VENDOR': 'vendor',
+    'Origin City': 'origin_city',
+    'Destination City': 'destination_city'
+}
+
+# Column layout of the melted bid rows
+BID_ROW_COLUMNS = ['vendor', 'origin_city', 'destination_city', 'shipper', 'truck_type', 'price']
+
+# Low-cardinality text columns, stored as categoricals instead of Python strings
+CATEGORY_COLUMNS = ['vendor', 'origin_city', 'destination_city', 'shipper', 'truck_type']
+
+
+# ------------------------ CLEANUP ------------------------ #
+def clean_columns(columns):
+    """Clean column names to remove "Unnamed" and "#REF!"."""
+    columns = pd.Index(columns).astype(str)
+    columns = columns.str.strip()  # Remove leading/trailing spaces
+    columns = columns.str.replace(r"Unnamed: \d+", "", regex=True)  # Remove "Unnamed: X"
+    columns = columns.str.replace(r"#REF!", "", regex=True)  # Remove "#REF!"
+    columns = columns.str.replace(r"\.+$", "", regex=True)  # Remove trailing dots
+    return columns
+
+
+def truck_type_columns(columns, truck_types=PREDEFINED_TRUCK_TYPES):
+    """Columns that are truck types (intersection with the predefined truck types)."""
+    return [col for col in columns if col in truck_types]
+
+
+# ------------------------ RESHAPE ------------------------ #
+def clean_sheet(df, shipper):
+    """Copy of one vendor sheet with clean column names and a shipper column."""
+    df = df.copy()
+    df.columns = clean_columns(df.columns)
+
+    # A sheet missing an ID column behaves like it did after pd.concat: all NaN
+    for col in ID_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df["shipper"] = shipper
+    return df
+
+
+def melt_clean_sheet(df, truck_types=PREDEFINED_TRUCK_TYPES):
+    """Reshape a sheet from clean_sheet into bid rows."""
+    value_columns = truck_type_columns(df.columns, truck_types)
+    if not value_columns:
+        return pd.DataFrame(columns=BID_ROW_COLUMNS)
+
+    # Reshape the data based on detected truck types
+    df = df.melt(
+        id_vars=ID_COLUMNS + ['shipper'],
+        value_vars=value_columns,
+        var_name='truck_type',
+        value_name='price'
+    ).dropna(subset=['price'])
+
+    df = df.rename(columns=ID_COLUMN_NAMES)
+
+    df['price'] = pd.to_numeric(df['price'], errors='coerce')
+    df = df.dropna(subset=['price'])
+    # Spelling variants of a vendor or city become one name, so they share lanes
+    df = canonical_names(compact_bid_rows(df[BID_ROW_COLUMNS])).drop_duplicates()
+    return df.reset_index(drop=True)
+
+
+def melt_bids(df, shipper, truck_types=PREDEFINED_TRUCK_TYPES):
+    """Reshape one vendor sheet into bid rows.
+
+    One row per (vendor, origin, destination, truck type) with a numeric price;
+    blank and non-numeric prices are dropped. Vendor and city names are
+    canonicalized (see tiering.names). Sheets without a truck type column
+    give an empty frame.
+    """
+    return melt_clean_sheet(clean_sheet(df, shipper), truck_types)
+
+
+def combine_bid_rows(frames):
+    """Concatenate bid rows from several sheets, dropping exact duplicates.
+
+    Each vendor and city name is respelled the way most rows of the round
+    spell it, since sheets may each have picked a different spelling.
+    """
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=BID_ROW_COLUMNS)
+    # Categoricals with different categories concatenate to object; re-compact
+    combined = canonical_names(compact_bid_rows(pd.concat(frames, ignore_index=True)))
+    return combined.drop_duplicates().reset_index(drop=True)
+
+
+# ------------------------ COMPACT STORAGE ------------------------ #
+def compact_prices(prices):
+    """Smallest integer dtype when every price is a whole number, else float."""
+    values = prices.to_numpy(dtype="float64", na_value=np.nan)
+    if len(values) and np.isfinite(values).all() and (values == np.round(values)).all():
+        return pd.to_numeric(values.astype("int64"), downcast="integer")
+    return prices.astype("float64")
+
+
+def compact_bid_rows(df):
+    """Categorical text columns and integer prices, in place of object/float columns."""
+    df = df.copy(deep=False)
+    for col in CATEGORY_COLUMNS:
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    if "price" in df:
+        df["price"] = compact_prices(df["price"])
+    return df
@@ -0,0 +1,87 @@
+# Per-session scratch space.
+#
+# Every Streamlit session gets its own temporary directory for the uploaded bid
+# ZIP, so two users uploading at the same time never touch each other's files.
+# Nothing is extracted into it: workbooks are read straight from the archive.
+#
+# Uploads are stored under the SHA-256 of their bytes and never rewritten, so a
+# background job still reading one upload is not handed a later one halfway.
+
+import hashlib
+import os
+import shutil
+import tempfile
+import weakref
+
+# ------------------------ CONSTANTS ------------------------ #
+# Uploads are copied in chunks of this many bytes
+COPY_CHUNK_SIZE = 1024 * 1024
+
+UPLOAD_FILE_NAME = "bids.zip"
+
+# Subdirectory holding one directory per distinct upload, named by its hash
+UPLOADS_DIR = "uploads"
+
+
+# ------------------------ WORKSPACE ------------------------ #
+class SessionWorkspace:
+    """A private temporary directory that removes itself.
+
+    Cleanup happens on `cleanup()`, when the object is garbage collected (e.g.
+    the Streamlit session ends) or at interpreter exit, whichever comes first.
+    """
+
+    def __init__(self, prefix="tiering-"):
+        self.path = tempfile.mkdtemp(prefix=prefix)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.path, ignore_errors=True)
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    def save_upload(self, uploaded_file, file_name=UPLOAD_FILE_NAME):
+        """Copy an uploaded file object into the workspace; returns `(path, sha256)`.
+
+        The bytes are hashed as they are copied and the file lands in a
+        directory named after that hash, so a path always holds the same bytes
+        and the hash is that of the copy that will be read. Uploading the same
+        bytes again gives the same path. `file_name` may include subdirectories.
+        """
+        if self.closed:
+            raise RuntimeError("workspace has been cleaned up")
+        digest = hashlib.sha256()
+        fd, partial = tempfile.mkstemp(dir=self.path, suffix=".part")
+        try:
+            uploaded_file.seek(0)
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: uploaded_file.read(COPY_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+            target = os.path.join(self.path, UPLOADS_DIR, digest.hexdigest(), file_name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(partial, target)
+        except BaseException:
+            _remove(partial)  # No partial uploads left behind
+            raise
+        return target, digest.hexdigest()
+
+    def discard(self, path):
+        """Delete one saved upload now instead of at cleanup; a missing file is fine."""
+        _remove(path)
+
+    def cleanup(self):
+        """Delete the directory and everything in it."""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass